@@ -0,0 +1,106 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees of separation queries at once."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "queries", nargs="?", default="-",
+        help="file of tab separated source/target names or IDs "
+             "(default: stdin)"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="queries handed to a worker at a time")
+    args = parser.parse_args()
+
+    if args.queries == "-":
+        run(args.directory, sys.stdin, sys.stdout, args.jobs, args.chunksize)
+    else:
+        with open(args.queries, encoding="utf-8") as f:
+            run(args.directory, f, sys.stdout, args.jobs, args.chunksize)
+
+
+def run(directory, lines, out, jobs=1, chunksize=64):
+    """
+    Answers every query in lines and writes one JSON object per query
+    to out, in input order.
+
+    The data is loaded once in this process. Forked workers share it
+    copy-on-write; where fork is unavailable each worker maps the
+    same snapshot file instead.
+    """
+    degrees.load_data(directory)
+    degrees.load_graph()
+    queries = parse_queries(lines)
+
+    if jobs <= 1:
+        for query in queries:
+            write(out, answer(query))
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        initializer, initargs = None, ()
+    else:
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = degrees.load_data, (directory,)
+    with context.Pool(jobs, initializer, initargs) as pool:
+        for result in pool.imap(answer, queries, chunksize):
+            write(out, result)
+
+
+def parse_queries(lines):
+    """
+    Yields (line number, source, target) for each non-blank line
+    of tab separated fields.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        fields = line.split("\t")
+        source = fields[0].strip()
+        target = fields[1].strip() if len(fields) > 1 else ""
+        yield number, source, target
+
+
+def answer(query):
+    """
+    Answers a single (line number, source, target) query.
+    """
+    number, source, target = query
+    start = time.perf_counter()
+    result = {"line": number, "source": source, "target": target}
+    try:
+        source_id = degrees.resolve_person(source)
+        target_id = degrees.resolve_person(target)
+    except LookupError as e:
+        result["error"] = str(e)
+    else:
+        path = degrees.load_graph().shortest_path(source_id, target_id)
+        result["source_id"] = source_id
+        result["target_id"] = target_id
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def write(out, result):
+    out.write(json.dumps(result) + "\n")
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
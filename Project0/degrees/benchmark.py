@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import degrees
+from snapshot import SNAPSHOT_NAME
+
+LOAD_MODES = ("csv", "snapshot", "columnar")
+METHODS = ("shortest_path", "bidirectional_path", "graph", "landmark")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading and searching a degrees data set."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--methods", nargs="+", choices=METHODS,
+                        default=list(METHODS))
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--measure-load", choices=LOAD_MODES,
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_load:
+        print(json.dumps(measure_load(args.directory, args.measure_load)))
+        return
+
+    report = run(args.directory, args.queries, args.seed, args.methods)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def run(directory, queries, seed, methods):
+    """
+    Returns a report of load times and peak memory per load mode, and
+    of query latency and people expanded per search method.
+    """
+    report = {
+        "directory": os.path.abspath(directory),
+        "python": platform.python_version(),
+        "seed": seed,
+        "load": {},
+        "queries": {},
+    }
+
+    # Each load runs in a fresh process so peak memory is its own;
+    # the first snapshot load parses the CSV files and writes it
+    snapshot = os.path.join(directory, SNAPSHOT_NAME)
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    for label, mode in (("csv", "csv"), ("snapshot_build", "snapshot"),
+                        ("snapshot", "snapshot"), ("columnar", "columnar")):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), directory,
+             "--measure-load", mode],
+            check=True, capture_output=True, text=True
+        ).stdout
+        report["load"][label] = json.loads(output)
+
+    degrees.load_data(directory)
+    graph = degrees.load_graph()
+    start = time.perf_counter()
+    degrees.load_landmarks()
+    report["load"]["landmarks_seconds"] = time.perf_counter() - start
+    report["people"] = len(degrees.people)
+    report["movies"] = len(degrees.movies)
+    report["stars"] = len(graph.person_movies)
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = []
+    while len(pairs) < queries:
+        source, target = rng.sample(person_ids, 2)
+        pairs.append((source, target))
+
+    for method in methods:
+        report["queries"][method] = measure_queries(method, pairs)
+    return report
+
+
+def measure_load(directory, mode):
+    """
+    Loads the data in one of LOAD_MODES and returns the time taken
+    and this process's peak resident memory.
+    """
+    start = time.perf_counter()
+    if mode == "csv":
+        degrees.load_data(directory, use_snapshot=False)
+        degrees.load_graph()
+    else:
+        degrees.load_data(directory, columnar=(mode == "columnar"))
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "peak_rss_kb": peak_rss_kb()}
+
+
+def measure_queries(method, pairs):
+    """
+    Times one search method over the query pairs.
+    """
+    graph = degrees.load_graph()
+    original = degrees.neighbors_for_person
+    expansions = [0]
+
+    def counted(person_id):
+        expansions[0] += 1
+        return original(person_id)
+
+    if method == "shortest_path":
+        search, count = degrees.shortest_path, True
+    elif method == "bidirectional_path":
+        search, count = degrees.bidirectional_path, True
+    elif method == "graph":
+        search, count = graph.shortest_path, False
+    else:
+        search, count = degrees.landmark_path, False
+
+    latencies = []
+    expanded = []
+    lengths = []
+    degrees.neighbors_for_person = counted
+    try:
+        for source, target in pairs:
+            expansions[0] = 0
+            start = time.perf_counter()
+            path = search(source, target)
+            latencies.append(time.perf_counter() - start)
+            expanded.append(expansions[0] if count else graph.expanded)
+            lengths.append(None if path is None else len(path))
+    finally:
+        degrees.neighbors_for_person = original
+
+    return {
+        "latency_seconds": summarize(latencies),
+        "expanded": summarize(expanded),
+        "connected": sum(length is not None for length in lengths),
+        "mean_degrees": mean([length for length in lengths
+                              if length is not None]),
+    }
+
+
+def summarize(values):
+    """
+    Returns the mean, maximum and 50th/90th/99th percentiles of values.
+    """
+    ordered = sorted(values)
+    return {
+        "mean": mean(ordered),
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else None,
+    }
+
+
+def percentile(ordered, p):
+    """
+    Returns the nearest-rank p-th percentile of a sorted list.
+    """
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def peak_rss_kb():
+    """
+    Returns the peak resident memory of this process in kilobytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+if __name__ == "__main__":
+    main()
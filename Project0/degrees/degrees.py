@@ -1,21 +1,129 @@
 import csv
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import CoStarGraph
+from nameindex import NameIndex
+from paths import all_shortest_paths, k_shortest_paths
+from records import LazyDict, MovieStore, PeopleStore, RecordStore
+from landmarks import LANDMARKS_NAME, LandmarkIndex, astar_path
+from snapshot import SNAPSHOT_NAME, data_signature, load_snapshot, \
+    save_snapshot
+from util import IndexedQueueFrontier, Node
 
 # Maps names to a set of corresponding person_ids
+# (a records.LazyDict over the snapshot when loaded from one)
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# (a records.LazyDict over the snapshot when loaded from one, or a
+# records.PeopleStore with the same lookups when loaded columnar)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# (a records.LazyDict over the snapshot when loaded from one, or a
+# records.MovieStore with the same lookups when loaded columnar)
 movies = {}
 
+# Compact integer-indexed view of people and movies, built on demand
+graph = None
 
-def load_data(directory):
+# Landmark distance index for the loaded data, loaded on demand
+landmarks = None
+
+# Accent-insensitive, prefix and fuzzy name lookup, built by load_data
+# or read from its snapshot
+name_index = None
+
+# Caches of results over the loaded data; apply_updates calls
+# invalidate(graph, person_ids) on each with the people whose co-stars
+# changed, and load_data calls clear() on each
+caches = []
+
+# Directory the current data was loaded from
+data_directory = None
+
+# Whether apply_updates has changed the data since it was loaded, so
+# files kept next to the CSV files no longer describe it
+updated = False
+
+
+def load_data(directory, use_snapshot=True, columnar=False):
     """
     Load data from CSV files into memory.
+
+    Unless use_snapshot is False, a binary snapshot kept next to the
+    CSV files is loaded instead when it matches their size and
+    modification time, and (re)written after parsing otherwise.
+    Records are then read from the snapshot as they are first used.
+
+    If columnar is True, people and movies become read-only columnar
+    stores over the co-star graph instead of dictionaries of dicts,
+    which takes a fraction of the memory.
+    """
+    global data_directory, name_index, names, people, movies, graph, \
+        landmarks, updated
+    data_directory = directory
+    updated = False
+    # Nothing derived from previously loaded data may carry over
+    names, people, movies, graph = {}, {}, {}, None
+    name_index = landmarks = None
+    for cache in caches:
+        cache.clear()
+
+    snapshot = None
+    if use_snapshot:
+        path = os.path.join(directory, SNAPSHOT_NAME)
+        signature = data_signature(directory)
+        snapshot = load_snapshot(path, signature)
+        if snapshot is None:
+            load_csv(directory)
+            name_index = NameIndex.from_data(people)
+            try:
+                save_snapshot(path, signature, people, movies, load_graph(),
+                              name_index)
+            except OSError:
+                # A read-only data directory just means no snapshot next time
+                pass
+        else:
+            name_index = snapshot.name_index
+    else:
+        load_csv(directory)
+        name_index = NameIndex.from_data(people)
+
+    if columnar:
+        if snapshot is not None:
+            graph = snapshot.graph
+            people = PeopleStore(graph, snapshot.person_names,
+                                 snapshot.person_births)
+            movies = MovieStore(graph, snapshot.movie_titles,
+                                snapshot.movie_years)
+            names = LazyDict(snapshot.names)
+        else:
+            graph = load_graph()
+            people = PeopleStore.from_data(graph, people)
+            movies = MovieStore.from_data(graph, movies)
+    elif snapshot is not None:
+        load_from_snapshot(snapshot)
+
+
+def load_from_snapshot(snapshot):
+    """
+    Serve names, people and movies from a loaded snapshot, copying
+    each entry out of it the first time it is read.
+    """
+    global names, people, movies, graph
+    graph = snapshot.graph
+    people = LazyDict(PeopleStore(graph, snapshot.person_names,
+                                  snapshot.person_births))
+    movies = LazyDict(MovieStore(graph, snapshot.movie_titles,
+                                 snapshot.movie_years))
+    names = LazyDict(snapshot.names)
+
+
+def load_csv(directory):
+    """
+    Parse the CSV files of a directory into names, people and movies.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -26,10 +134,7 @@ def load_data(directory):
                 "birth": row["birth"],
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_name(row["name"], row["id"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
@@ -52,6 +157,187 @@ def load_data(directory):
                 pass
 
 
+def add_name(name, person_id):
+    """
+    Adds a person_id to the set of people with a name in names.
+    """
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+    else:
+        names[name.lower()].add(person_id)
+
+
+def load_updates(directory):
+    """
+    Apply whichever of people.csv, movies.csv and stars.csv exist in
+    a directory of new rows to the loaded data.
+    """
+    rows = {}
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                rows[filename] = list(csv.DictReader(f))
+        else:
+            rows[filename] = []
+    return apply_updates(rows["people.csv"], rows["movies.csv"],
+                         rows["stars.csv"])
+
+
+def apply_updates(new_people=(), new_movies=(), new_stars=()):
+    """
+    Add rows shaped like those of people.csv, movies.csv and stars.csv
+    to the loaded data without reloading it.
+
+    The graph, name index and landmark distances are updated in place,
+    and registered caches drop only the entries the new links can
+    affect. Returns the set of person_ids whose co-stars changed.
+    """
+    global graph, updated
+    columnar = isinstance(people, RecordStore)
+
+    added_people = {}
+    for row in new_people:
+        if row["id"] in people or row["id"] in added_people:
+            continue
+        added_people[row["id"]] = row
+        if columnar:
+            people.append(row)
+        else:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+        add_name(row["name"], row["id"])
+        if name_index is not None:
+            name_index.add(row["name"], row["id"])
+
+    added_movies = {}
+    for row in new_movies:
+        if row["id"] in movies or row["id"] in added_movies:
+            continue
+        added_movies[row["id"]] = row
+        if columnar:
+            movies.append(row)
+        else:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    added_stars = []
+    pending = set()
+    for row in new_stars:
+        person_id = row["person_id"]
+        movie_id = row["movie_id"]
+        if person_id not in people and person_id not in added_people:
+            continue
+        if movie_id not in movies and movie_id not in added_movies:
+            continue
+        if (person_id, movie_id) in pending:
+            continue
+        if person_id not in added_people and movie_id not in added_movies \
+                and movie_id in people[person_id]["movies"]:
+            continue
+        pending.add((person_id, movie_id))
+        added_stars.append((person_id, movie_id))
+        if not columnar:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+
+    if added_people or added_movies or added_stars:
+        updated = True
+
+    if graph is not None:
+        graph = graph.with_updates(list(added_people), list(added_movies),
+                                   added_stars)
+        if columnar:
+            people.graph = movies.graph = graph
+        if landmarks is not None:
+            landmarks.update(graph, {
+                graph.movie_index[movie_id] for _, movie_id in added_stars
+            })
+
+    affected = set()
+    for person_id, movie_id in added_stars:
+        affected.update(movies[movie_id]["stars"])
+        if name_index is not None:
+            name_index.popularity[person_id] = len(people[person_id]["movies"])
+    if affected:
+        for cache in caches:
+            cache.invalidate(load_graph(), affected)
+    return affected
+
+
+def load_graph():
+    """
+    Returns the compact co-star graph for the loaded data,
+    building it on first use.
+    """
+    global graph
+    if graph is None:
+        graph = CoStarGraph.from_data(people, movies)
+    return graph
+
+
+def load_landmarks():
+    """
+    Returns the landmark index for the loaded data, reading it from
+    the data directory or building and saving it on first use.
+
+    Once apply_updates has changed the data, the file would describe
+    other data than its signature says, so it is neither read nor
+    written and the index is only built in memory.
+    """
+    global landmarks
+    if landmarks is None:
+        graph = load_graph()
+        if updated:
+            landmarks = LandmarkIndex.build(graph)
+            return landmarks
+        path = os.path.join(data_directory, LANDMARKS_NAME)
+        signature = data_signature(data_directory)
+        landmarks = LandmarkIndex.load(path, signature, len(graph))
+        if landmarks is None:
+            landmarks = LandmarkIndex.build(graph)
+            try:
+                landmarks.save(path, signature)
+            except OSError:
+                pass
+    return landmarks
+
+
+def separation_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark index, without searching. upper is
+    None if unknown. Returns None if they are not connected.
+    """
+    return load_landmarks().bounds(load_graph(), source, target)
+
+
+def landmark_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, found by A* search
+    guided by the landmark index.
+
+    If no possible path, returns None.
+    """
+    return astar_path(load_graph(), load_landmarks(), source, target)
+
+
+def distances_from(source):
+    """
+    Returns the degrees of separation from a source person to every
+    person, as a sweep.Distances. Requires NumPy.
+    """
+    from sweep import single_source
+    return single_source(load_graph(), source)
+
+
 def main():
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
@@ -69,7 +355,12 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    # bidirectional_path does not print, unlike shortest_path
+    if source == target:
+        person = people[source]["name"]
+        print(f"{person} has starred in all movies as {person}")
+
+    path = bidirectional_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -99,7 +390,7 @@ def shortest_path(source, target):
         
     start = Node(source, None, None)
     #as we want the shortest path, a queue is used to implement BFS
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     explored = set()
@@ -129,33 +420,168 @@ def shortest_path(source, target):
                 frontier.add(child_node)
 
 
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards
+    from both people at once.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # parents map a person to the (movie_id, person_id) step towards
+    # the side's root; the depth maps hold each person's distance to it
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # always grow the smaller frontier by one whole level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, depth = (forward_frontier, forward_parents,
+                                        forward_depth)
+            other_parents, other_depth = backward_parents, backward_depth
+        else:
+            frontier, parents, depth = (backward_frontier, backward_parents,
+                                        backward_depth)
+            other_parents, other_depth = forward_parents, forward_depth
+
+        meeting = None
+        best = None
+        next_frontier = []
+        for person_id in frontier:
+            level = depth[person_id] + 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in other_depth:
+                    # finish the level so the shortest meeting point wins
+                    length = level + other_depth[neighbor]
+                    if best is None or length < best:
+                        best = length
+                        meeting = (person_id, movie_id, neighbor)
+                if neighbor not in depth:
+                    depth[neighbor] = level
+                    parents[neighbor] = (movie_id, person_id)
+                    next_frontier.append(neighbor)
+
+        if meeting is not None:
+            person_id, movie_id, neighbor = meeting
+            if parents is forward_parents:
+                return _join_paths(forward_parents, backward_parents,
+                                   person_id, movie_id, neighbor)
+            return _join_paths(forward_parents, backward_parents,
+                               neighbor, movie_id, person_id)
+
+        if parents is forward_parents:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _join_paths(forward_parents, backward_parents, left, movie_id, right):
+    """
+    Joins the two search halves through the edge left -(movie_id)- right,
+    where left was reached from the source and right from the target.
+    """
+    path = []
+    person_id = left
+    while forward_parents[person_id] is not None:
+        step_movie, previous = forward_parents[person_id]
+        path.append((step_movie, person_id))
+        person_id = previous
+    path.reverse()
+
+    path.append((movie_id, right))
+    person_id = right
+    while backward_parents[person_id] is not None:
+        step_movie, following = backward_parents[person_id]
+        path.append((step_movie, following))
+        person_id = following
+    return path
+
+
+def all_shortest(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+    """
+    return all_shortest_paths(load_graph(), source, target)
+
+
+def k_shortest(source, target, k):
+    """
+    Yields up to k distinct lists of (movie_id, person_id) pairs
+    that connect the source to the target, shortest first.
+    """
+    return k_shortest_paths(load_graph(), source, target, k)
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names that do not match exactly are looked up ignoring accents,
+    then by prefix and spelling, and the candidates offered.
     """
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) == 0 and name_index is not None:
+        person_ids = sorted(name_index.lookup(name))
+        if len(person_ids) == 0:
+            person_ids = name_index.search(name)
+            if person_ids:
+                return choose_person(f"No exact match for '{name}'. "
+                                     "Did you mean:", person_ids)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
-        print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(f"Which '{name}'?", person_ids)
     else:
         return person_ids[0]
 
 
+def resolve_person(field):
+    """
+    Returns the person_id for a field holding an ID or an unambiguous
+    name, without prompting. Raises LookupError otherwise.
+    """
+    if field in people:
+        return field
+    person_ids = names.get(field.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    elif person_ids:
+        raise LookupError(f"ambiguous name: {field!r}")
+    raise LookupError(f"person not found: {field!r}")
+
+
+def choose_person(prompt, person_ids):
+    """
+    Lists candidate people and returns the ID the user picks,
+    or None.
+    """
+    print(prompt)
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
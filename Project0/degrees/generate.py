@@ -0,0 +1,109 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Anna", "Ben", "Carla", "Chris", "Dana", "David", "Elena",
+    "Emma", "Frank", "Grace", "Hugo", "Ines", "Jack", "Julia", "Kevin",
+    "Lena", "Liam", "Maria", "Mark", "Nina", "Omar", "Paula", "Peter",
+    "Rosa", "Sam", "Sofia", "Tom", "Vera", "Will", "Zoe",
+]
+LAST_SYLLABLES = [
+    "ba", "con", "der", "el", "fer", "gan", "hal", "is", "ko", "lan", "mar",
+    "ner", "os", "per", "quin", "ro", "son", "ta", "ver", "wes",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic IMDb-like degrees data set."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--stars", type=float, default=1e5,
+                        help="number of star rows to write (1e4 to 1e7)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cast-exponent", type=float, default=2.2,
+                        help="power law exponent of cast sizes")
+    parser.add_argument("--fame-exponent", type=float, default=0.8,
+                        help="power law exponent of how often people are cast")
+    args = parser.parse_args()
+    generate(args.directory, int(args.stars), args.seed, args.cast_exponent,
+             args.fame_exponent)
+
+
+def generate(directory, stars, seed=0, cast_exponent=2.2, fame_exponent=0.8):
+    """
+    Writes people.csv, movies.csv and stars.csv with about the given
+    number of star rows to a directory.
+
+    Cast sizes follow a power law, so most movies have a handful of
+    credited people and a few have hundreds, and people are cast with
+    Zipf-like popularity, so a few appear in very many movies. The
+    same seed always writes the same files.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # About three credits per person, as in the IMDb data
+    people_count = max(2, stars // 3)
+    fame = list(itertools.accumulate(
+        1 / rank ** fame_exponent for rank in range(1, people_count + 1)
+    ))
+    person_ids = rng.sample(range(1, people_count * 10), people_count)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            name = f"{rng.choice(FIRST_NAMES)} {last_name(rng)}"
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([person_id, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="",
+              encoding="utf-8") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w", newline="",
+                 encoding="utf-8") as stars_file:
+        movie_writer = csv.writer(movies_file)
+        star_writer = csv.writer(stars_file)
+        movie_writer.writerow(["id", "title", "year"])
+        star_writer.writerow(["person_id", "movie_id"])
+
+        written = 0
+        movie_id = 100000
+        while written < stars:
+            movie_id += rng.randint(1, 9)
+            title = " ".join(last_name(rng).title()
+                             for _ in range(rng.randint(1, 3)))
+            movie_writer.writerow([movie_id, title, rng.randint(1920, 2024)])
+
+            size = min(cast_size(rng, cast_exponent), stars - written,
+                       people_count)
+            cast = set()
+            while len(cast) < size:
+                cast.update(rng.choices(person_ids, cum_weights=fame,
+                                        k=size - len(cast)))
+            for person_id in cast:
+                star_writer.writerow([person_id, movie_id])
+            written += size
+
+
+def cast_size(rng, exponent, largest=500):
+    """
+    Draws a cast size of at least 1 from a discrete power law.
+    """
+    return min(largest, int(rng.paretovariate(exponent - 1)))
+
+
+def last_name(rng):
+    """
+    Returns a random made-up surname, with collisions between people.
+    """
+    syllables = rng.choices(LAST_SYLLABLES, k=rng.randint(2, 3))
+    return "".join(syllables).title()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+from array import array
+
+
+class CoStarGraph():
+    """
+    Compact bipartite person-movie graph.
+
+    People and movies are mapped to dense integer indices, and both
+    directions of the star relation are stored in compressed sparse
+    row form: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]], and the
+    people of movie m are
+    movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, person_index=None,
+                 movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Number of people expanded by the last search
+        self.expanded = 0
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds the graph from the `people` and `movies` dictionaries
+        produced by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets = array("i", [0])
+        person_movies = array("i")
+        for person_id in person_ids:
+            person_movies.extend(
+                sorted(movie_index[movie_id]
+                       for movie_id in people[person_id]["movies"])
+            )
+            person_offsets.append(len(person_movies))
+
+        movie_offsets = array("i", [0])
+        movie_people = array("i")
+        for movie_id in movie_ids:
+            movie_people.extend(
+                sorted(person_index[person_id]
+                       for person_id in movies[movie_id]["stars"])
+            )
+            movie_offsets.append(len(movie_people))
+
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    def with_updates(self, person_ids, movie_ids, stars):
+        """
+        Returns a new graph with extra people, movies and
+        (person_id, movie_id) star pairs, leaving this one untouched
+        for searches still running on it.
+
+        Only the rows that gain entries are rewritten; the CSR arrays
+        are otherwise copied slice by slice.
+        """
+        person_index = self.person_index.copy()
+        for person_id in person_ids:
+            person_index[person_id] = len(person_index)
+        movie_index = self.movie_index.copy()
+        for movie_id in movie_ids:
+            movie_index[movie_id] = len(movie_index)
+
+        person_additions = {}
+        movie_additions = {}
+        for person_id, movie_id in stars:
+            person = person_index[person_id]
+            movie = movie_index[movie_id]
+            person_additions.setdefault(person, []).append(movie)
+            movie_additions.setdefault(movie, []).append(person)
+
+        person_offsets, person_movies = splice(
+            self.person_offsets, self.person_movies, person_additions,
+            len(person_index)
+        )
+        movie_offsets, movie_people = splice(
+            self.movie_offsets, self.movie_people, movie_additions,
+            len(movie_index)
+        )
+        return CoStarGraph(
+            self.person_ids + list(person_ids),
+            self.movie_ids + list(movie_ids),
+            person_offsets, person_movies, movie_offsets, movie_people,
+            person_index, movie_index
+        )
+
+    def distances_to(self, people, limit):
+        """
+        Returns a dictionary of the degrees of separation, up to limit,
+        of everyone within limit of any of the given person indices.
+        """
+        distances = {person: 0 for person in people}
+        seen_movies = set()
+        frontier = list(distances)
+        level = 0
+        while frontier and level < limit:
+            level += 1
+            next_frontier = []
+            for person in frontier:
+                for movie in self.movies_of(person):
+                    if movie in seen_movies:
+                        continue
+                    seen_movies.add(movie)
+                    for costar in self.people_of(movie):
+                        if costar not in distances:
+                            distances[costar] = level
+                            next_frontier.append(costar)
+            frontier = next_frontier
+        return distances
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices of a person index as a zero-copy view.
+        """
+        return memoryview(self.person_movies)[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def people_of(self, movie):
+        """
+        Returns the person indices of a movie index as a zero-copy view.
+        """
+        return memoryview(self.movie_people)[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person_id):
+        """
+        Yields (movie_id, person_id) pairs for people who starred
+        with a given person, including the person themselves.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        person = self.person_index[person_id]
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            movie_id = self.movie_ids[movie]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie_id, self.person_ids[movie_people[j]]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        Each movie is expanded at most once, so a cast is never
+        rescanned from every one of its members.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            self.expanded = 0
+            return []
+        start = self.person_index[source]
+        goal = self.person_index[target]
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # parents map a person index to its (movie, person) predecessor
+        parents = {start: None}
+        seen_movies = set()
+        frontier = [start]
+        expanded = 0
+        while frontier:
+            next_frontier = []
+            for person in frontier:
+                expanded += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if movie in seen_movies:
+                        continue
+                    seen_movies.add(movie)
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        costar = movie_people[j]
+                        if costar in parents:
+                            continue
+                        parents[costar] = (movie, person)
+                        if costar == goal:
+                            self.expanded = expanded
+                            return self._path(parents, goal)
+                        next_frontier.append(costar)
+            frontier = next_frontier
+
+        self.expanded = expanded
+        return None
+
+    def _path(self, parents, person):
+        """
+        Follows parent links back from a person index to the search root.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, previous = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = previous
+        path.reverse()
+        return path
+
+
+def splice(offsets, values, additions, size):
+    """
+    Returns new CSR offsets and values with the lists in additions
+    appended to their rows, and the row count grown to size.
+    """
+    rows = len(offsets) - 1
+    end = offsets[rows]
+    if size > rows:
+        offsets = array("i", offsets)
+        offsets.extend([end] * (size - rows))
+
+    values = memoryview(values)
+    new_offsets = array("i")
+    new_values = array("i")
+    shift = 0
+    row = 0
+    for changed in sorted(additions):
+        extra = additions[changed]
+        new_offsets.extend(shifted(offsets[row:changed + 1], shift))
+        new_values.frombytes(
+            values[offsets[row]:offsets[changed + 1]].cast("B")
+        )
+        new_values.extend(extra)
+        shift += len(extra)
+        row = changed + 1
+    new_offsets.extend(shifted(offsets[row:size + 1], shift))
+    new_values.frombytes(values[offsets[row]:end].cast("B"))
+    return new_offsets, new_values
+
+
+def shifted(offsets, shift):
+    """
+    Returns a copy of a run of offsets moved along by shift.
+    """
+    if not shift:
+        return array("i", offsets)
+    return array("i", map(shift.__add__, offsets))
@@ -0,0 +1,260 @@
+import heapq
+import json
+import os
+import struct
+from array import array
+
+# Landmark files carry this magic and version; any other file is rebuilt
+MAGIC = b"DEGLMK\0\0"
+VERSION = 1
+
+LANDMARKS_NAME = "degrees.landmarks"
+LANDMARK_COUNT = 32
+
+# Distances are stored one byte per person; this marks "not reachable"
+UNREACHABLE = 255
+
+# Magic, format version and JSON header length
+PREAMBLE = struct.Struct("<8sII")
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few high-degree landmark people
+    to every person in a CoStarGraph.
+
+    By the triangle inequality, for any landmark L the separation of
+    a and b lies between |d(L, a) - d(L, b)| and d(L, a) + d(L, b).
+    """
+
+    def __init__(self, landmarks, distances):
+        # Person indices of the landmarks, and one distance array each
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=LANDMARK_COUNT):
+        """
+        Runs a full BFS from each of the count people with the most
+        co-star links and records their distances.
+        """
+        degree = [0] * len(graph)
+        for person in range(len(graph)):
+            for movie in graph.movies_of(person):
+                degree[person] += len(graph.people_of(movie)) - 1
+        ranked = sorted(range(len(graph)), key=lambda p: -degree[p])
+        landmarks = [p for p in ranked[:count] if degree[p] > 0]
+        return cls(landmarks,
+                   [distances_from(graph, landmark)
+                    for landmark in landmarks])
+
+    def bounds(self, graph, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two person_ids; upper is None when no landmark reaches
+        both. Returns None when they are known not to be connected.
+        """
+        a = graph.person_index[source]
+        b = graph.person_index[target]
+        if a == b:
+            return 0, 0
+        return self._bounds(a, b)
+
+    def _bounds(self, a, b):
+        lower = 1
+        upper = None
+        for distances in self.distances:
+            da = distances[a]
+            db = distances[b]
+            if da == UNREACHABLE and db == UNREACHABLE:
+                continue
+            if da == UNREACHABLE or db == UNREACHABLE:
+                # One is in the landmark's component and the other is not
+                return None
+            lower = max(lower, abs(da - db))
+            if upper is None or da + db < upper:
+                upper = da + db
+        return lower, upper
+
+    def estimate(self, a, b):
+        """
+        Returns the landmark lower bound between two person indices,
+        an admissible heuristic for A*.
+        """
+        best = 0
+        for distances in self.distances:
+            da = distances[a]
+            db = distances[b]
+            if da != UNREACHABLE and db != UNREACHABLE:
+                gap = da - db if da > db else db - da
+                if gap > best:
+                    best = gap
+        return best
+
+    def update(self, graph, movies):
+        """
+        Brings the distances up to date with a graph that gained
+        people, and cast members in the given movie indices.
+
+        New links can only shorten distances, so each landmark's
+        distances are lowered from the touched movies outwards and
+        nothing else is recomputed.
+        """
+        for distances in self.distances:
+            if len(distances) < len(graph):
+                distances.extend(
+                    array("B", [UNREACHABLE]) * (len(graph) - len(distances))
+                )
+
+            queue = []
+            for movie in movies:
+                cast = graph.people_of(movie)
+                best = min(distances[person] for person in cast)
+                if best >= UNREACHABLE - 1:
+                    continue
+                for person in cast:
+                    if best + 1 < distances[person]:
+                        distances[person] = best + 1
+                        heapq.heappush(queue, (best + 1, person))
+
+            while queue:
+                distance, person = heapq.heappop(queue)
+                if distance != distances[person] \
+                        or distance >= UNREACHABLE - 1:
+                    continue
+                for movie in graph.movies_of(person):
+                    for costar in graph.people_of(movie):
+                        if distance + 1 < distances[costar]:
+                            distances[costar] = distance + 1
+                            heapq.heappush(queue, (distance + 1, costar))
+
+    def save(self, path, signature):
+        """
+        Writes the index to path, keyed by the data's signature.
+        """
+        header = json.dumps({
+            "signature": signature,
+            "landmarks": self.landmarks,
+        }).encode("utf-8")
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+                f.write(header)
+                for distances in self.distances:
+                    f.write(distances)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def load(cls, path, signature, size):
+        """
+        Reads an index written by save for a graph of size people.
+
+        Returns None if the file is missing, stale or malformed.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            magic, version, header_length = PREAMBLE.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return None
+            header = json.loads(
+                data[PREAMBLE.size:PREAMBLE.size + header_length]
+            )
+        except (struct.error, ValueError):
+            return None
+        if header.get("signature") != signature:
+            return None
+
+        landmarks = header.get("landmarks", [])
+        start = PREAMBLE.size + header_length
+        if len(data) != start + size * len(landmarks):
+            return None
+        distances = []
+        for i in range(len(landmarks)):
+            distances.append(array(
+                "B", data[start + i * size:start + (i + 1) * size]
+            ))
+        return cls(landmarks, distances)
+
+
+def distances_from(graph, person):
+    """
+    Returns an array of the degrees of separation of every person
+    index from the given one, capped below UNREACHABLE.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph)
+    distances[person] = 0
+    seen_movies = set()
+    frontier = [person]
+    level = 0
+    while frontier and level < UNREACHABLE - 1:
+        level += 1
+        next_frontier = []
+        for current in frontier:
+            for movie in graph.movies_of(current):
+                if movie in seen_movies:
+                    continue
+                seen_movies.add(movie)
+                for costar in graph.people_of(movie):
+                    if distances[costar] == UNREACHABLE:
+                        distances[costar] = level
+                        next_frontier.append(costar)
+        frontier = next_frontier
+    return distances
+
+
+def astar_path(graph, index, source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, using the landmark lower
+    bounds as an A* heuristic.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        graph.expanded = 0
+        return []
+    start = graph.person_index[source]
+    goal = graph.person_index[target]
+    if index._bounds(start, goal) is None:
+        graph.expanded = 0
+        return None
+
+    # parents map a person index to its (movie, person) predecessor
+    parents = {start: None}
+    cost = {start: 0}
+    # ties on f = g + h go to the deepest entry, the one nearest the goal
+    queue = [(index.estimate(start, goal), 0, start)]
+    done = set()
+    expanded = 0
+    while queue:
+        _, depth, person = heapq.heappop(queue)
+        g = -depth
+        if person == goal:
+            graph.expanded = expanded
+            return graph._path(parents, goal)
+        if person in done:
+            continue
+        done.add(person)
+        expanded += 1
+        for movie in graph.movies_of(person):
+            for costar in graph.people_of(movie):
+                if costar in done:
+                    continue
+                if costar not in cost or g + 1 < cost[costar]:
+                    cost[costar] = g + 1
+                    parents[costar] = (movie, person)
+                    heapq.heappush(
+                        queue,
+                        (g + 1 + index.estimate(costar, goal), -g - 1, costar)
+                    )
+
+    graph.expanded = expanded
+    return None
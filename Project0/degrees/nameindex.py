@@ -0,0 +1,300 @@
+import bisect
+import unicodedata
+import zlib
+from array import array
+
+# Misspellings of up to this many edits are found through the index
+DELETES = 2
+
+# Names are grouped for the deletion index by this many first characters
+PREFIX = 10
+
+
+class NameIndex():
+    """
+    Person name lookup by exact name, prefix, or approximate spelling.
+
+    Names are normalized before indexing, so matching ignores case,
+    accents and repeated whitespace. The distinct normalized names are
+    kept sorted, so exact names and prefixes are found by binary search.
+
+    Misspellings are found with a deletion index, as in SymSpell. Names
+    sharing their first PREFIX characters form a group, and every string
+    left by deleting up to DELETES characters of that prefix is hashed
+    to the group. A name within DELETES edits of a query has a prefix
+    that shares such a deletion with a query prefix at most DELETES
+    characters longer or shorter, so only the groups those deletions
+    hash to have their names measured.
+
+    The index is a few flat arrays, which snapshot.py stores so that a
+    warm load does not rebuild it. People added afterwards are kept in
+    a plain dict and checked one by one.
+    """
+
+    def __init__(self, ids, keys, offsets, members, weights, groups,
+                 hashes, hash_groups):
+        # person_ids by position, and a ranking weight for each position
+        self.ids = ids
+        self.weights = weights
+        # Sorted normalized names; the positions of the people under
+        # keys[k] are members[offsets[k]:offsets[k + 1]]
+        self.keys = keys
+        self.offsets = offsets
+        self.members = members
+        # Keys of group g are keys[groups[g]:groups[g + 1]], and sorted
+        # deletion hashes map to groups through hash_groups
+        self.groups = groups
+        self.hashes = hashes
+        self.hash_groups = hash_groups
+
+        # Normalized names of people added since, mapped to person_ids,
+        # and the sorted names among them that keys lacks
+        self.added = {}
+        self.added_keys = []
+        # Maps person_ids to a ranking weight replacing their stored one
+        self.popularity = {}
+
+    @classmethod
+    def from_data(cls, people):
+        """
+        Builds an index of the `people` dictionary of degrees.load_data,
+        ranking equally close matches by number of movies.
+        """
+        ids = []
+        names = []
+        weights = array("i")
+        for person_id, person in people.items():
+            ids.append(person_id)
+            names.append(person["name"])
+            weights.append(len(person["movies"]))
+        return cls.build(ids, names, weights)
+
+    @classmethod
+    def build(cls, ids, names, weights):
+        """
+        Indexes the person at each position of ids under the name at
+        the same position of names, ranked by weights.
+        """
+        positions = {}
+        for i, name in enumerate(names):
+            positions.setdefault(normalize(name), []).append(i)
+        keys = sorted(positions)
+
+        offsets = array("i", [0])
+        members = array("i")
+        groups = array("i")
+        for k, key in enumerate(keys):
+            members.extend(positions[key])
+            offsets.append(len(members))
+            if k == 0 or key[:PREFIX] != keys[k - 1][:PREFIX]:
+                groups.append(k)
+        groups.append(len(keys))
+
+        # Each entry packs a hash and its group into one integer, which
+        # sorts in far less memory than pairs would
+        entries = sorted(
+            name_hash(deletion) << 32 | g
+            for g in range(len(groups) - 1)
+            for deletion in deletions(keys[groups[g]][:PREFIX], DELETES)
+        )
+        hashes = array("I", (entry >> 32 for entry in entries))
+        hash_groups = array("i", (entry & 0xFFFFFFFF for entry in entries))
+        return cls(ids, keys, offsets, members, weights, groups, hashes,
+                   hash_groups)
+
+    def add(self, name, person_id, popularity=0):
+        """
+        Indexes one more person under a name.
+        """
+        key = normalize(name)
+        self.popularity[person_id] = popularity
+        if key not in self.added:
+            self.added[key] = set()
+            if self._find(key) is None:
+                bisect.insort(self.added_keys, key)
+        self.added[key].add(person_id)
+
+    def lookup(self, name):
+        """
+        Returns the set of person_ids whose name matches exactly,
+        ignoring case and accents.
+        """
+        return {person_id for person_id, _ in self._people(normalize(name))}
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit person_ids whose name starts with prefix,
+        most popular first.
+        """
+        prefix = normalize(prefix)
+        matches = []
+        for keys in (self.keys, self.added_keys):
+            i = bisect.bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                matches.extend((0, person_id, weight)
+                               for person_id, weight in self._people(keys[i]))
+                i += 1
+        return self._rank(matches, limit)
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to limit person_ids whose name is within max_distance
+        edits of name, closest and then most popular first.
+
+        Distances above DELETES are not indexed, and measure every name.
+        """
+        key = normalize(name)
+        pattern = compile_pattern(key)
+        if max_distance > DELETES:
+            candidates = range(len(self.keys))
+        else:
+            candidates = self._candidates(key, max_distance)
+        measured = ((self.keys, candidates),
+                    (self.added_keys, range(len(self.added_keys))))
+        matches = []
+        for keys, positions in measured:
+            for k in positions:
+                distance = pattern_distance(pattern, keys[k])
+                if distance <= max_distance:
+                    matches.extend((distance, person_id, weight)
+                                   for person_id, weight
+                                   in self._people(keys[k]))
+        return self._rank(matches, limit)
+
+    def search(self, query, limit=10, max_distance=2):
+        """
+        Returns up to limit ranked candidate person_ids for a query:
+        exact matches, then prefix completions, then misspellings.
+        """
+        candidates = []
+        for person_ids in (sorted(self.lookup(query)),
+                           self.complete(query, limit),
+                           self.fuzzy(query, max_distance, limit)):
+            for person_id in person_ids:
+                if person_id not in candidates:
+                    candidates.append(person_id)
+        return candidates[:limit]
+
+    def _find(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def _people(self, key):
+        """
+        Returns (person_id, weight) pairs for everyone indexed under a
+        normalized name.
+        """
+        people = []
+        k = self._find(key)
+        if k is not None:
+            for i in self.members[self.offsets[k]:self.offsets[k + 1]]:
+                people.append((self.ids[i], self.weights[i]))
+        people.extend((person_id, 0) for person_id in self.added.get(key, ()))
+        return people
+
+    def _candidates(self, key, max_distance):
+        """
+        Yields the positions in keys of every name that may be within
+        max_distance edits of a normalized name.
+        """
+        prefixes = {key[:length] for length in range(
+            max(PREFIX - max_distance, 0), PREFIX + max_distance + 1
+        )}
+        found = set()
+        for prefix in prefixes:
+            for deletion in deletions(prefix, max_distance):
+                h = name_hash(deletion)
+                i = bisect.bisect_left(self.hashes, h)
+                while i < len(self.hashes) and self.hashes[i] == h:
+                    found.add(self.hash_groups[i])
+                    i += 1
+        for g in sorted(found):
+            yield from range(self.groups[g], self.groups[g + 1])
+
+    def _rank(self, matches, limit):
+        matches.sort(key=lambda match: (
+            match[0], -self.popularity.get(match[1], match[2]), match[1]
+        ))
+        return [person_id for _, person_id, _ in matches[:limit]]
+
+
+def normalize(name):
+    """
+    Folds a name to lowercase without accents or repeated whitespace.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def deletions(string, count):
+    """
+    Returns the set of strings left by deleting up to count characters
+    of string, string itself included.
+    """
+    found = {string}
+    frontier = {string}
+    for _ in range(count):
+        frontier = {s[:i] + s[i + 1:] for s in frontier for i in range(len(s))}
+        found |= frontier
+    return found
+
+
+def name_hash(string):
+    """
+    Returns a hash of a string that is the same in every process, so
+    it can be stored.
+    """
+    return zlib.crc32(string.encode("utf-8"))
+
+
+def edit_distance(a, b):
+    """
+    Returns the Levenshtein distance between two strings.
+    """
+    return pattern_distance(compile_pattern(a), b)
+
+
+def compile_pattern(a):
+    """
+    Precomputes the per-character bit masks of a string for
+    pattern_distance, so one string can be compared against many.
+    """
+    masks = {}
+    for i, c in enumerate(a):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks, len(a)
+
+
+def pattern_distance(pattern, b):
+    """
+    Returns the Levenshtein distance between a compiled pattern and
+    a string, using Myers' bit-parallel algorithm: one column of the
+    edit distance table is updated per character of b as a handful
+    of integer operations.
+    """
+    masks, length = pattern
+    if not length:
+        return len(b)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive = full
+    negative = 0
+    score = length
+    for c in b:
+        equal = masks.get(c, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        up = negative | ~(horizontal | positive)
+        down = positive & horizontal
+        if up & last:
+            score += 1
+        elif down & last:
+            score -= 1
+        up = (up << 1) | 1
+        down <<= 1
+        positive = (down | ~(vertical | up)) & full
+        negative = up & vertical
+    return score
@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+
+# Returned by PathCache.get when a pair has no cached result
+MISSING = object()
+
+
+class PathCache():
+    """
+    Bounded least-recently-used cache of shortest_path results.
+
+    Entries are keyed on the unordered pair of people, so a path
+    cached from a to b also answers b to a, reversed. All methods
+    are safe to call from several threads.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Bumped by clear and invalidate, so results computed before
+        # either are dropped
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, source, target):
+        """
+        Returns the cached path from source to target, which may be
+        None for unconnected people, or MISSING.
+        """
+        key = pair(source, target)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            path = self.entries[key]
+        if path is None or key[0] == source:
+            return path
+        return reverse_path(key[0], path)
+
+    def put(self, source, target, path, generation=None):
+        """
+        Caches the path from source to target. A generation read
+        before the search started makes the result be discarded if
+        the data has changed since.
+        """
+        key = pair(source, target)
+        if path is not None and key[0] != source:
+            path = reverse_path(source, path)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops every entry, as when different data is loaded.
+        """
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def invalidate(self, graph, person_ids):
+        """
+        Drops the entries that new links between the given people
+        could have changed.
+
+        A cached path of length d between a and b can only get
+        shorter through a new link if a and b are both within d - 2 of
+        its ends, so everything else is kept. Unconnected pairs are
+        always dropped, as any new link might join them.
+        """
+        with self.lock:
+            self.generation += 1
+            entries = list(self.entries.items())
+        longest = max((len(path) for _, path in entries if path), default=0)
+        distances = graph.distances_to(
+            {graph.person_index[person_id] for person_id in person_ids},
+            longest - 2
+        )
+
+        stale = []
+        for (a, b), path in entries:
+            if path is None:
+                stale.append((a, b))
+                continue
+            da = distances.get(graph.person_index[a])
+            db = distances.get(graph.person_index[b])
+            if da is not None and db is not None and da + db + 1 < len(path):
+                stale.append((a, b))
+        with self.lock:
+            for key in stale:
+                self.entries.pop(key, None)
+
+    def stats(self):
+        """
+        Returns a dictionary of the cache's size and hit counts.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def pair(source, target):
+    """
+    Returns the unordered pair of two person_ids as a sorted tuple.
+    """
+    return (source, target) if source <= target else (target, source)
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the end of a (movie_id, person_id) path
+    starting at source back to source.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
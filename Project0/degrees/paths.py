@@ -0,0 +1,152 @@
+import heapq
+import itertools
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connects the source to the target in a CoStarGraph.
+
+    A breadth-first search records, for each person, the movies that
+    reached them at their level and, for each movie, the people of
+    the previous level in it. Paths are read off that layered graph
+    one at a time, so callers can stop early however many there are.
+    """
+    if source == target:
+        yield []
+        return
+    start = graph.person_index[source]
+    goal = graph.person_index[target]
+
+    # Person index -> movies reaching it from the level before
+    reached_by = {start: []}
+    depth = {start: 0}
+    # Movie index -> people of the level before who starred in it
+    entered_from = {}
+    frontier = [start]
+    level = 0
+    while frontier and goal not in reached_by:
+        level += 1
+        level_movies = {}
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if movie in entered_from:
+                    continue
+                level_movies.setdefault(movie, []).append(person)
+        entered_from.update(level_movies)
+
+        next_frontier = []
+        for movie in level_movies:
+            for costar in graph.people_of(movie):
+                if costar not in depth:
+                    depth[costar] = level
+                    reached_by[costar] = [movie]
+                    next_frontier.append(costar)
+                elif depth[costar] == level:
+                    reached_by[costar].append(movie)
+        frontier = next_frontier
+
+    if goal not in reached_by:
+        return
+
+    def walk(person, suffix):
+        if person == start:
+            yield [(graph.movie_ids[movie], graph.person_ids[costar])
+                   for movie, costar in reversed(suffix)]
+            return
+        for movie in reached_by[person]:
+            for previous in entered_from[movie]:
+                suffix.append((movie, person))
+                yield from walk(previous, suffix)
+                suffix.pop()
+
+    yield from walk(goal, [])
+
+
+def k_shortest_paths(graph, source, target, k=None):
+    """
+    Yields up to k distinct connections from the source to the target,
+    as lists of (movie_id, person_id) pairs, shortest first. With k of
+    None, yields every connection that never repeats a person.
+
+    This is Yen's algorithm: each new path branches off an earlier one
+    at some person, with the links earlier paths took from there
+    removed, and the shortest such candidate is taken next.
+    """
+    start = graph.person_index[source]
+    goal = graph.person_index[target]
+    first = constrained_path(graph, start, goal, set(), set())
+    if first is None:
+        return
+
+    found = [first]
+    candidates = []
+    seen = {tuple(first)}
+    counter = itertools.count()
+    while True:
+        yield [(graph.movie_ids[movie], graph.person_ids[person])
+               for movie, person in found[-1]]
+        if k is not None and len(found) >= k:
+            return
+
+        last = found[-1]
+        people = [start] + [person for _, person in last]
+        for i in range(len(last)):
+            root = last[:i]
+            removed_links = {
+                path[i] for path in found
+                if len(path) > i and path[:i] == root
+            }
+            spur = constrained_path(graph, people[i], goal,
+                                    set(people[:i]), removed_links)
+            if spur is None:
+                continue
+            path = root + spur
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (len(path), next(counter), path))
+
+        if not candidates:
+            return
+        found.append(heapq.heappop(candidates)[2])
+
+
+def constrained_path(graph, start, goal, removed_people, removed_links):
+    """
+    Returns the shortest list of (movie, person) index pairs from start
+    to goal that avoids removed_people and does not leave start by any
+    (movie, person) link in removed_links, or None.
+    """
+    if start == goal:
+        return []
+    parents = {start: None}
+    for person in removed_people:
+        parents.setdefault(person, None)
+    seen_movies = set()
+    blocked_movies = {movie for movie, _ in removed_links}
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_of(person):
+                if movie in seen_movies:
+                    continue
+                if person != start or movie not in blocked_movies:
+                    seen_movies.add(movie)
+                for costar in graph.people_of(movie):
+                    if costar in parents:
+                        continue
+                    if person == start and (movie, costar) in removed_links:
+                        continue
+                    parents[costar] = (movie, person)
+                    if costar == goal:
+                        path = []
+                        while costar != start:
+                            movie, previous = parents[costar]
+                            path.append((movie, costar))
+                            costar = previous
+                        path.reverse()
+                        return path
+                    next_frontier.append(costar)
+        frontier = next_frontier
+    return None
@@ -0,0 +1,437 @@
+import bisect
+from abc import abstractmethod
+from array import array
+from collections.abc import ItemsView, Mapping, MutableMapping, Set
+
+# Stored in place of an empty birth or year; the smallest 32-bit
+# integer, which no year in the data can be
+NO_YEAR = -2 ** 31
+
+
+class StringColumn():
+    """
+    Strings packed into one UTF-8 buffer, where string i spans
+    buffer[offsets[i]:offsets[i + 1]] and is decoded on access.
+
+    Strings appended after construction are kept in a plain list.
+    """
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.extra = []
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = array("q", [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            offsets.append(total)
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.extra)
+
+    def __getitem__(self, i):
+        size = len(self.offsets) - 1
+        if i >= size:
+            return self.extra[i - size]
+        return str(self.buffer[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __add__(self, strings):
+        """
+        Returns a column sharing this one's buffer, with strings appended.
+        """
+        column = StringColumn(self.buffer, self.offsets)
+        column.extra = self.extra + list(strings)
+        return column
+
+    def append(self, string):
+        self.extra.append(string)
+
+
+class ColumnIndex(Mapping):
+    """
+    Mapping from the distinct strings of a StringColumn to their
+    positions, found by binary search over order, the positions
+    sorted by string. Nothing is decoded up front.
+
+    Positions set after construction are kept in a plain dict.
+    """
+
+    def __init__(self, column, order):
+        self.column = column
+        self.order = order
+        self.extra = {}
+
+    def copy(self):
+        index = ColumnIndex(self.column, self.order)
+        index.extra = dict(self.extra)
+        return index
+
+    def __getitem__(self, key):
+        if key in self.extra:
+            return self.extra[key]
+        order = self.order
+        i = bisect.bisect_left(order, key, key=self.column.__getitem__)
+        if i < len(order) and self.column[order[i]] == key:
+            return order[i]
+        raise KeyError(key)
+
+    def __setitem__(self, key, i):
+        self.extra[key] = i
+
+    def __iter__(self):
+        for i in range(len(self.order)):
+            yield self.column[i]
+        yield from self.extra
+
+    def __len__(self):
+        return len(self.order) + len(self.extra)
+
+
+class ColumnGroups(Mapping):
+    """
+    Mapping from a key of the strings of a StringColumn, such as their
+    lowercase form, to the set of IDs at the positions with that key.
+
+    order lists the positions sorted by key, and ids and index map
+    positions to IDs and back, as in a CoStarGraph.
+    """
+
+    def __init__(self, column, order, key, ids, index):
+        self.column = column
+        self.order = order
+        self.key = key
+        self.ids = ids
+        self.index = index
+
+    def _key_at(self, i):
+        return self.key(self.column[i])
+
+    def __getitem__(self, key):
+        start = bisect.bisect_left(self.order, key, key=self._key_at)
+        end = bisect.bisect_right(self.order, key, lo=start, key=self._key_at)
+        if start == end:
+            raise KeyError(key)
+        return MemberView(self.order[start:end], self.ids, self.index)
+
+    def __iter__(self):
+        previous = None
+        for i in self.order:
+            key = self._key_at(i)
+            if key != previous:
+                yield key
+                previous = key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class LazyDict(MutableMapping):
+    """
+    Dictionary over a read-only mapping, such as a RecordStore, that
+    copies each value out of it the first time it is read, so values
+    can be changed in place as with a plain dict. Only the entries
+    read or written take memory of their own.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        # Entries copied out of base or set since
+        self.loaded = {}
+        # Keys of base deleted since
+        self.removed = set()
+
+    def __getitem__(self, key):
+        if key in self.loaded:
+            return self.loaded[key]
+        if key in self.removed:
+            raise KeyError(key)
+        value = self.loaded[key] = self.base[key].copy()
+        return value
+
+    def __setitem__(self, key, value):
+        self.loaded[key] = value
+        self.removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.loaded.pop(key, None)
+        if key in self.base:
+            self.removed.add(key)
+
+    def __contains__(self, key):
+        return key in self.loaded \
+            or (key not in self.removed and key in self.base)
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+        for key in self.loaded:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        added = sum(1 for key in self.loaded if key not in self.base)
+        return len(self.base) - len(self.removed) + added
+
+
+class RecordStore(Mapping):
+    """
+    Read-only mapping from IDs to lightweight record views, backed by
+    columns indexed like the IDs of a CoStarGraph.
+
+    It answers the same lookups as the people and movies dictionaries
+    of degrees.load_data, without a dict and a set per record.
+    """
+
+    def __init__(self, graph, fields, members):
+        self.graph = graph
+        # Maps field names to StringColumns or integer year arrays
+        self.fields = fields
+        # Name of the field holding the CSR slice of linked IDs
+        self.members = members
+
+    @abstractmethod
+    def ids(self):
+        """
+        Returns the IDs of the records in order.
+        """
+
+    @abstractmethod
+    def index(self):
+        """
+        Returns the mapping from IDs to record numbers.
+        """
+
+    @abstractmethod
+    def linked(self, i):
+        """
+        Returns the linked IDs of record i as a MemberView.
+        """
+
+    def __getitem__(self, key):
+        return RecordView(self, self.index()[key])
+
+    def __contains__(self, key):
+        return key in self.index()
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def __len__(self):
+        return len(self.ids())
+
+    def items(self):
+        return RecordItems(self)
+
+    def append(self, row, fields):
+        """
+        Adds a record's fields from a CSV row. It becomes visible once
+        the store's graph contains its ID.
+        """
+        for field in fields:
+            column = self.fields[field]
+            value = row[field]
+            if not isinstance(column, StringColumn) and not is_year(value):
+                # Keep the value as it is by turning the column to strings
+                column = self.fields[field] = StringColumn.from_strings(
+                    map(decode_year, column)
+                )
+            if isinstance(column, StringColumn):
+                column.append(value)
+            else:
+                if not isinstance(column, array):
+                    # Columns mapped from a snapshot are read-only
+                    column = self.fields[field] = array("i", column)
+                column.append(encode_year(value))
+
+
+class PeopleStore(RecordStore):
+    """
+    Columnar people: person_id -> {name, birth, movies}.
+    """
+
+    FIELDS = ("name", "birth")
+
+    def __init__(self, graph, names, births):
+        super().__init__(graph, {"name": names, "birth": births}, "movies")
+
+    @classmethod
+    def from_data(cls, graph, people):
+        """
+        Packs the `people` dictionary of degrees.load_data.
+        """
+        rows = [people[person_id] for person_id in graph.person_ids]
+        return cls(graph,
+                   StringColumn.from_strings(row["name"] for row in rows),
+                   year_column([row["birth"] for row in rows]))
+
+    def ids(self):
+        return self.graph.person_ids
+
+    def index(self):
+        return self.graph.person_index
+
+    def linked(self, i):
+        return MemberView(self.graph.movies_of(i), self.graph.movie_ids,
+                          self.graph.movie_index)
+
+    def append(self, row):
+        super().append(row, self.FIELDS)
+
+
+class MovieStore(RecordStore):
+    """
+    Columnar movies: movie_id -> {title, year, stars}.
+    """
+
+    FIELDS = ("title", "year")
+
+    def __init__(self, graph, titles, years):
+        super().__init__(graph, {"title": titles, "year": years}, "stars")
+
+    @classmethod
+    def from_data(cls, graph, movies):
+        """
+        Packs the `movies` dictionary of degrees.load_data.
+        """
+        rows = [movies[movie_id] for movie_id in graph.movie_ids]
+        return cls(graph,
+                   StringColumn.from_strings(row["title"] for row in rows),
+                   year_column([row["year"] for row in rows]))
+
+    def ids(self):
+        return self.graph.movie_ids
+
+    def index(self):
+        return self.graph.movie_index
+
+    def linked(self, i):
+        return MemberView(self.graph.people_of(i), self.graph.person_ids,
+                          self.graph.person_index)
+
+    def append(self, row):
+        super().append(row, self.FIELDS)
+
+
+class RecordItems(ItemsView):
+    """
+    Items of a RecordStore, visited by position rather than looked up
+    by ID one at a time.
+    """
+
+    def __iter__(self):
+        store = self._mapping
+        for i, key in enumerate(store.ids()):
+            yield key, RecordView(store, i)
+
+
+class RecordView(Mapping):
+    """
+    One record of a RecordStore, read field by field from its columns.
+    """
+
+    __slots__ = ("store", "i")
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, field):
+        if field == self.store.members:
+            return self.store.linked(self.i)
+        column = self.store.fields[field]
+        if isinstance(column, StringColumn):
+            return column[self.i]
+        return decode_year(column[self.i])
+
+    def __iter__(self):
+        yield from self.store.fields
+        yield self.store.members
+
+    def __len__(self):
+        return len(self.store.fields) + 1
+
+    def copy(self):
+        """
+        Returns the record as a plain dict, with its linked IDs as a set.
+        """
+        record = {field: self[field] for field in self.store.fields}
+        record[self.store.members] = self.store.linked(self.i).copy()
+        return record
+
+
+class MemberView(Set):
+    """
+    Read-only set of the IDs in a CSR slice of dense indices.
+    """
+
+    __slots__ = ("indices", "ids", "index")
+
+    def __init__(self, indices, ids, index):
+        self.indices = indices
+        self.ids = ids
+        self.index = index
+
+    def __contains__(self, key):
+        i = self.index.get(key)
+        return i is not None and i in self.indices
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.ids[i]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def copy(self):
+        return set(self)
+
+
+def year_column(values):
+    """
+    Returns year strings from the CSV files as an integer array, or as
+    a StringColumn if any of them would not come back the same.
+    """
+    if all(map(is_year, values)):
+        return array("i", map(encode_year, values))
+    return StringColumn.from_strings(values)
+
+
+def is_year(value):
+    """
+    Checks if a year string from the CSV files is empty or an integer
+    that encode_year stores exactly, such as "1970" but not "c. 1900"
+    or " 1970".
+    """
+    if value == "":
+        return True
+    try:
+        year = int(value)
+    except ValueError:
+        return False
+    return str(year) == value and NO_YEAR < year < 2 ** 31
+
+
+def encode_year(value):
+    """
+    Converts a year string for which is_year holds to an integer.
+    """
+    return NO_YEAR if value == "" else int(value)
+
+
+def decode_year(value):
+    """
+    Converts a stored year back to the string the CSV files hold.
+    """
+    return "" if value == NO_YEAR else str(value)
@@ -0,0 +1,133 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from pathcache import MISSING, PathCache
+
+# Shared by every request; registered with degrees so updates invalidate it
+cache = PathCache()
+
+
+class Latency():
+    """
+    Thread-safe count, total and maximum of request durations.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def record(self, seconds):
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            self.slowest = max(self.slowest, seconds)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queries": self.count,
+                "mean_seconds": self.total / self.count if self.count else 0.0,
+                "max_seconds": self.slowest,
+            }
+
+
+latency = Latency()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation queries over HTTP."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--cache-size", type=int, default=cache.capacity)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    degrees.load_graph()
+    print("Data loaded.")
+
+    cache.capacity = args.cache_size
+    degrees.caches.append(cache)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def separation(source, target):
+    """
+    Answers a query for two names or IDs as a JSON-ready dictionary.
+    """
+    start = time.perf_counter()
+    result = {"source": source, "target": target}
+    try:
+        source_id = degrees.resolve_person(source)
+        target_id = degrees.resolve_person(target)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+
+    path = cache.get(source_id, target_id)
+    result["cached"] = path is not MISSING
+    if path is MISSING:
+        generation = cache.generation
+        path = degrees.load_graph().shortest_path(source_id, target_id)
+        cache.put(source_id, target_id, path, generation)
+
+    result["source_id"] = source_id
+    result["target_id"] = target_id
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    result["seconds"] = time.perf_counter() - start
+    latency.record(result["seconds"])
+    return result
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    GET /separation?source=...&target=... answers a query;
+    GET /stats reports cache and latency counters.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/separation":
+            query = parse_qs(url.query)
+            source = query.get("source", [""])[0]
+            target = query.get("target", [""])[0]
+            result = separation(source, target)
+            self.reply(404 if "error" in result else 200, result)
+        elif url.path == "/stats":
+            self.reply(200, {"cache": cache.stats(),
+                             "latency": latency.stats()})
+        else:
+            self.reply(404, {"error": f"unknown path: {url.path}"})
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    main()
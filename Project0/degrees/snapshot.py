@@ -0,0 +1,216 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import CoStarGraph
+from nameindex import NameIndex
+from records import ColumnGroups, ColumnIndex, StringColumn, year_column
+
+# Snapshots carry this magic and version; any other file is rebuilt
+MAGIC = b"DEGSNAP\0"
+VERSION = 5
+
+SNAPSHOT_NAME = "degrees.snapshot"
+DATA_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Magic, format version and JSON header length
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+STRING_COLUMNS = ("person_ids", "person_names", "movie_ids", "movie_titles")
+YEAR_COLUMNS = ("person_births", "movie_years")
+GRAPH_ARRAYS = ("person_offsets", "person_movies",
+                "movie_offsets", "movie_people")
+# Positions sorted by ID, and people sorted by lowercase name, so IDs
+# and names are found by binary search instead of a dict built on load
+ORDER_ARRAYS = ("person_order", "movie_order", "name_order")
+# NameIndex arrays, stored with a "name_" prefix next to its name_keys
+NAME_ARRAYS = ("offsets", "members", "weights", "groups", "hashes",
+               "hash_groups")
+
+
+class Snapshot():
+    """
+    Decoded contents of a snapshot file.
+
+    IDs, names and titles are StringColumns, and births and years are
+    integer arrays, or StringColumns when some are not plain integers,
+    as records.PeopleStore and MovieStore use them. These and the
+    graph's CSR arrays are memoryviews straight into the mapped file.
+    names maps lowercase names to sets of person_ids as degrees.names
+    does, and name_index is the nameindex.NameIndex of the people, over
+    arrays in the mapped file too.
+    """
+    def __init__(self, columns, graph, names, name_index):
+        self.person_ids = columns["person_ids"]
+        self.person_names = columns["person_names"]
+        self.person_births = columns["person_births"]
+        self.movie_ids = columns["movie_ids"]
+        self.movie_titles = columns["movie_titles"]
+        self.movie_years = columns["movie_years"]
+        self.graph = graph
+        self.names = names
+        self.name_index = name_index
+
+
+def data_signature(directory):
+    """
+    Returns the size and modification time of each CSV file in a
+    directory, which identifies the data a snapshot was built from.
+    """
+    signature = []
+    for filename in DATA_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature.append([filename, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def save_snapshot(path, signature, people, movies, graph, name_index):
+    """
+    Writes people, movies, the co-star graph and the name index of the
+    people to a snapshot file. The name index must list people in the
+    order of graph.person_ids, as both do when built from people.
+
+    The file is written next to its final path and moved into place,
+    so readers never see a partial snapshot.
+    """
+    people_rows = [people[person_id] for person_id in graph.person_ids]
+    movie_rows = [movies[movie_id] for movie_id in graph.movie_ids]
+    columns = {
+        "person_ids": graph.person_ids,
+        "person_names": [person["name"] for person in people_rows],
+        "person_births": [person["birth"] for person in people_rows],
+        "movie_ids": graph.movie_ids,
+        "movie_titles": [movie["title"] for movie in movie_rows],
+        "movie_years": [movie["year"] for movie in movie_rows],
+    }
+
+    blobs = []
+    for name in STRING_COLUMNS:
+        add_strings(blobs, name, StringColumn.from_strings(columns[name]))
+    for name in YEAR_COLUMNS:
+        years = year_column(columns[name])
+        if isinstance(years, StringColumn):
+            add_strings(blobs, name, years)
+        else:
+            blobs.append((name, "i", years))
+    for name in GRAPH_ARRAYS:
+        blobs.append((name, "i", array("i", getattr(graph, name))))
+    orders = {
+        "person_order": sorted(range(len(graph.person_ids)),
+                               key=columns["person_ids"].__getitem__),
+        "movie_order": sorted(range(len(graph.movie_ids)),
+                              key=columns["movie_ids"].__getitem__),
+        "name_order": sorted(range(len(graph.person_ids)),
+                             key=lambda i: people_rows[i]["name"].lower()),
+    }
+    for name in ORDER_ARRAYS:
+        blobs.append((name, "i", array("i", orders[name])))
+    add_strings(blobs, "name_keys", StringColumn.from_strings(name_index.keys))
+    for name in NAME_ARRAYS:
+        blob = getattr(name_index, name)
+        blobs.append(("name_" + name, blob.typecode, blob))
+
+    sections = []
+    position = 0
+    for name, typecode, blob in blobs:
+        length = len(blob) * blob.itemsize if isinstance(blob, array) \
+            else len(blob)
+        sections.append([name, typecode, position, length])
+        position = align(position + length)
+    header = json.dumps({
+        "signature": signature,
+        "sections": sections,
+    }).encode("utf-8")
+    start = align(PREAMBLE.size + len(header))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for (_, _, offset, _), (_, _, blob) in zip(sections, blobs):
+                f.write(b"\0" * (start + offset - f.tell()))
+                f.write(blob)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load_snapshot(path, signature):
+    """
+    Maps a snapshot file into memory.
+
+    Returns None if the file is missing, was written by another
+    format version, or was built from different CSV files.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, header_length = PREAMBLE.unpack_from(mapped)
+        if magic != MAGIC or version != VERSION:
+            return None
+        header = json.loads(
+            mapped[PREAMBLE.size:PREAMBLE.size + header_length]
+        )
+        if header["signature"] != signature:
+            return None
+        start = align(PREAMBLE.size + header_length)
+        view = memoryview(mapped)
+        arrays = {}
+        for name, typecode, offset, length in header["sections"]:
+            if start + offset + length > len(mapped):
+                return None
+            arrays[name] = view[start + offset:start + offset + length] \
+                .cast(typecode)
+    except (struct.error, ValueError, KeyError, TypeError):
+        return None
+
+    columns = {name: strings(arrays, name) for name in STRING_COLUMNS}
+    for name in YEAR_COLUMNS:
+        # Years that are not all plain integers are stored as strings
+        columns[name] = strings(arrays, name) if name + ".data" in arrays \
+            else arrays[name]
+    graph = CoStarGraph(
+        columns["person_ids"], columns["movie_ids"],
+        *(arrays[name] for name in GRAPH_ARRAYS),
+        ColumnIndex(columns["person_ids"], arrays["person_order"]),
+        ColumnIndex(columns["movie_ids"], arrays["movie_order"])
+    )
+    names = ColumnGroups(columns["person_names"], arrays["name_order"],
+                         str.lower, graph.person_ids, graph.person_index)
+    name_index = NameIndex(
+        graph.person_ids,
+        strings(arrays, "name_keys"),
+        *(arrays["name_" + name] for name in NAME_ARRAYS)
+    )
+    return Snapshot(columns, graph, names, name_index)
+
+
+def add_strings(blobs, name, column):
+    """
+    Adds the sections of a StringColumn to the blobs of a snapshot.
+    """
+    blobs.append((name + ".data", "B", column.buffer))
+    blobs.append((name + ".offsets", "q", column.offsets))
+
+
+def strings(arrays, name):
+    """
+    Returns the StringColumn over the sections written by add_strings.
+    """
+    return StringColumn(arrays[name + ".data"], arrays[name + ".offsets"])
+
+
+def align(position):
+    """
+    Rounds a byte position up to the array alignment.
+    """
+    return -(-position // ALIGNMENT) * ALIGNMENT
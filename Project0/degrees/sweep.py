@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class Distances():
+    """
+    Degrees of separation from one source person to everyone.
+
+    distance[p] is -1 for people not connected to the source. For
+    every other person but the source, parent_person[p] and
+    parent_movie[p] give the step that reached them, so paths are
+    only built when asked for.
+    """
+
+    def __init__(self, graph, source, distance, parent_person, parent_movie):
+        self.graph = graph
+        self.source = source
+        self.distance = distance
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+
+    def __getitem__(self, person_id):
+        """
+        Returns the degrees of separation of a person_id, or None.
+        """
+        distance = int(self.distance[self.graph.person_index[person_id]])
+        return None if distance < 0 else distance
+
+    def path_to(self, person_id):
+        """
+        Returns the list of (movie_id, person_id) pairs that connect
+        the source to a person, or None if they are not connected.
+        """
+        person = self.graph.person_index[person_id]
+        if self.distance[person] < 0:
+            return None
+        path = []
+        while self.parent_person[person] >= 0:
+            path.append((self.graph.movie_ids[self.parent_movie[person]],
+                         self.graph.person_ids[person]))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+    def histogram(self):
+        """
+        Returns a list whose item d counts the people at distance d.
+        """
+        reached = self.distance[self.distance >= 0]
+        return np.bincount(reached).tolist()
+
+
+def single_source(graph, source):
+    """
+    Returns the Distances from a source person_id to every person in
+    a CoStarGraph.
+
+    The search is level-synchronous: each level gathers the movies
+    of the whole frontier and then their casts as array operations,
+    with boolean masks dropping movies and people already reached.
+    """
+    person_offsets = np.frombuffer(graph.person_offsets, dtype=np.intc)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.intc)
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.intc)
+    movie_people = np.frombuffer(graph.movie_people, dtype=np.intc)
+
+    size = len(person_offsets) - 1
+    start = graph.person_index[source]
+    distance = np.full(size, -1, dtype=np.int32)
+    parent_person = np.full(size, -1, dtype=np.int32)
+    parent_movie = np.full(size, -1, dtype=np.int32)
+    seen_movies = np.zeros(len(movie_offsets) - 1, dtype=bool)
+
+    distance[start] = 0
+    frontier = np.array([start], dtype=np.intc)
+    level = 0
+    while frontier.size:
+        level += 1
+
+        # Movies of the frontier not yet expanded, each credited
+        # to the first frontier member found in it
+        movies, owners = gather(person_offsets, person_movies, frontier)
+        fresh = ~seen_movies[movies]
+        movies, first = np.unique(movies[fresh], return_index=True)
+        owners = frontier[owners[fresh][first]]
+        seen_movies[movies] = True
+
+        # Cast members of those movies not reached at an earlier level
+        people, via = gather(movie_offsets, movie_people, movies)
+        fresh = distance[people] < 0
+        people, first = np.unique(people[fresh], return_index=True)
+        via = via[fresh][first]
+
+        distance[people] = level
+        parent_person[people] = owners[via]
+        parent_movie[people] = movies[via]
+        frontier = people
+
+    return Distances(graph, source, distance, parent_person, parent_movie)
+
+
+def gather(offsets, values, rows):
+    """
+    Concatenates the CSR slices of the given rows.
+
+    Returns the values and, for each value, the position in rows of
+    the row it came from.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    ends = np.cumsum(counts)
+    positions = np.arange(ends[-1] if len(ends) else 0) \
+        - np.repeat(ends - counts - starts, counts)
+    return values[positions], owners
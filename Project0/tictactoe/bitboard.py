@@ -0,0 +1,445 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is two 9-bit integers, the squares held by X and by O,
+where square (i, j) is bit 3 * i + j. Moves are bit ORs, wins are
+looked up in a 512-entry table and the side to move comes from the
+popcounts, so the search never copies a board.
+
+Run this file to write tictactoe.table, the solved game, which
+best_move then answers from in constant time.
+"""
+
+import json
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Bits of every row, column and diagonal
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINS[bits] is True if the squares in bits include a full line
+WINS = [any(bits & mask == mask for mask in WIN_MASKS)
+        for bits in range(FULL + 1)]
+
+# Search order of squares: center, corners, then edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Solved game table: every reachable position's value and best move
+SOLVED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "tictactoe.table")
+SOLVED_MAGIC = b"TTTSOLVE"
+SOLVED_VERSION = 1
+# Magic, version, record count and CRC-32 of the records
+SOLVED_HEADER = struct.Struct("<8sIII")
+# Canonical key, value from X's point of view, best canonical square
+SOLVED_RECORD = struct.Struct("<Ibb")
+
+# Kinds of bound a transposition table value is
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# SQUARE_MAPS[s][square] is where symmetry s moves a square to
+SQUARE_MAPS = [
+    [3 * i2 + j2 for i in range(3) for j in range(3)
+     for i2, j2 in [transform(i, j)]]
+    for transform in (
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i),
+    )
+]
+INVERSE_SQUARE_MAPS = [
+    [square_map.index(square) for square in range(9)]
+    for square_map in SQUARE_MAPS
+]
+
+# PERMUTED[s][bits] is the bit set bits moved by symmetry s
+PERMUTED = [
+    [sum(1 << square_map[square] for square in range(9)
+         if bits >> square & 1)
+     for bits in range(FULL + 1)]
+    for square_map in SQUARE_MAPS
+]
+
+
+def to_bits(board):
+    """
+    Returns the (x, o) bitboards of a list of lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list of lists board of (x, o) bitboards.
+    """
+    return [[X if x >> (3 * i + j) & 1
+             else O if o >> (3 * i + j) & 1
+             else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def to_action(square):
+    """
+    Returns the (i, j) action of a square index, or None.
+    """
+    return None if square is None else divmod(square, 3)
+
+
+def x_to_move(x, o):
+    return x.bit_count() == o.bit_count()
+
+
+def winner(x, o):
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def utility(x, o):
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def ordered_moves(x, o):
+    """
+    Returns the empty squares, most promising first: moves that win
+    at once, then the center, corners and edges.
+    """
+    occupied = x | o
+    mine = x if x_to_move(x, o) else o
+    wins = []
+    others = []
+    for square in ORDER:
+        bit = 1 << square
+        if occupied & bit:
+            continue
+        if WINS[mine | bit]:
+            wins.append(square)
+        else:
+            others.append(square)
+    return wins + others
+
+
+def best_move(x, o, table=None, stats=None):
+    """
+    Returns the optimal square for the player to move, or None if
+    the game is over, adding the work done to stats if given.
+    """
+    if stats is None:
+        return _best_move(x, o, table, None)
+    start = time.perf_counter()
+    try:
+        return _best_move(x, o, table, stats)
+    finally:
+        stats.calls += 1
+        stats.seconds += time.perf_counter() - start
+
+
+def _best_move(x, o, table, stats):
+    if terminal(x, o):
+        return None
+    solved = solved_table()
+    if solved is not None:
+        key, symmetry = canonical(x, o)
+        entry = solved.get(key)
+        if entry is not None:
+            if stats is not None:
+                stats.cache_hits += 1
+            return INVERSE_SQUARE_MAPS[symmetry][entry[1]]
+    if table is not None:
+        entry = table.lookup(x, o)
+        if entry is not None and entry[1] == EXACT and entry[2] is not None:
+            if stats is not None:
+                stats.cache_hits += 1
+            return entry[2]
+    return search(x, o, -math.inf, math.inf, table, stats)[1]
+
+
+def search(x, o, alpha, beta, table=None, stats=None):
+    """
+    Returns the alpha-beta value of a position, from X's point of
+    view, and the best square found for the player to move,
+    consulting and filling table if one is given.
+    """
+    if stats is not None:
+        stats.nodes += 1
+        if terminal(x, o):
+            stats.terminals += 1
+    if WINS[x]:
+        return 1, None
+    if WINS[o]:
+        return -1, None
+    if x | o == FULL:
+        return 0, None
+
+    hint = None
+    if table is not None:
+        entry = table.lookup(x, o)
+        if entry is not None:
+            value, bound, hint = entry
+            if bound == EXACT \
+                    or (bound == LOWER and value >= beta) \
+                    or (bound == UPPER and value <= alpha):
+                if stats is not None:
+                    stats.cache_hits += 1
+                return value, hint
+    original_alpha = alpha
+    original_beta = beta
+
+    moves = ordered_moves(x, o)
+    if hint in moves:
+        moves.remove(hint)
+        moves.insert(0, hint)
+
+    best = None
+    if x_to_move(x, o):
+        v = -math.inf
+        for square in moves:
+            value = search(x | 1 << square, o, alpha, beta, table,
+                           stats)[0]
+            if value > v:
+                v = value
+                best = square
+            alpha = max(alpha, v)
+            # a forced win cannot be improved on
+            if alpha >= beta or v == 1:
+                if stats is not None:
+                    stats.cutoffs += 1
+                break
+    else:
+        v = math.inf
+        for square in moves:
+            value = search(x, o | 1 << square, alpha, beta, table,
+                           stats)[0]
+            if value < v:
+                v = value
+                best = square
+            beta = min(beta, v)
+            if alpha >= beta or v == -1:
+                if stats is not None:
+                    stats.cutoffs += 1
+                break
+
+    if table is not None:
+        if v <= original_alpha:
+            bound = UPPER
+        elif v >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(x, o, v, bound, best)
+    return v, best
+
+
+class TranspositionTable():
+    """
+    Search results keyed by position, shared across searches.
+
+    The 8 rotations and reflections of a position get one canonical
+    key, so a position is solved once for all of its symmetric
+    copies. Best moves are stored in canonical coordinates and mapped
+    back to the position they are looked up for.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def lookup(self, x, o):
+        """
+        Returns (value, bound, best square) for a position, or None.
+        """
+        key, symmetry = canonical(x, o)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, bound, square = entry
+        if square is not None:
+            square = INVERSE_SQUARE_MAPS[symmetry][square]
+        return value, bound, square
+
+    def store(self, x, o, value, bound, square):
+        key, symmetry = canonical(x, o)
+        if square is not None:
+            square = SQUARE_MAPS[symmetry][square]
+        self.entries[key] = (value, bound, square)
+
+
+class SearchStats():
+    """
+    Running totals of the work done by the best_move calls it is
+    passed to; pass a fresh one, or reset it, for a single call.
+
+    Cache hits count answers from the solved game table and the
+    transposition table, and cutoffs count move loops cut short.
+    """
+
+    FIELDS = ("calls", "nodes", "terminals", "cache_hits", "cutoffs",
+              "seconds")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.nodes = 0
+        self.terminals = 0
+        self.cache_hits = 0
+        self.cutoffs = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def __repr__(self):
+        counts = ", ".join(f"{field}={value!r}"
+                           for field, value in self.as_dict().items())
+        return f"SearchStats({counts})"
+
+
+def canonical(x, o):
+    """
+    Returns the smallest 18-bit encoding of a position over its 8
+    symmetries, and the index of the symmetry that produces it.
+    """
+    best = FULL << 9 | FULL
+    best_symmetry = 0
+    for symmetry, permuted in enumerate(PERMUTED):
+        key = permuted[x] << 9 | permuted[o]
+        if key < best:
+            best = key
+            best_symmetry = symmetry
+    return best, best_symmetry
+
+
+_solved = None
+_solved_loaded = False
+_solved_lock = threading.Lock()
+
+
+def solved_table():
+    """
+    Returns the solved game table as a dictionary from canonical key
+    to (value, best canonical square), reading it on first use.
+
+    Returns None if the table file is missing or corrupt, in which
+    case moves are found by search.
+    """
+    global _solved, _solved_loaded
+    if not _solved_loaded:
+        with _solved_lock:
+            if not _solved_loaded:
+                _solved = read_solved_table(SOLVED_PATH)
+                _solved_loaded = True
+    return _solved
+
+
+def solve():
+    """
+    Returns the value and best canonical square of every reachable,
+    unfinished position, keyed by canonical key.
+    """
+    table = TranspositionTable()
+    solved = {}
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        key, symmetry = canonical(x, o)
+        if key in solved or terminal(x, o):
+            continue
+        value, square = search(x, o, -math.inf, math.inf, table)
+        solved[key] = (value, SQUARE_MAPS[symmetry][square])
+        for move in range(9):
+            bit = 1 << move
+            if (x | o) & bit:
+                continue
+            stack.append((x | bit, o) if x_to_move(x, o) else (x, o | bit))
+    return solved
+
+
+def write_solved_table(path=SOLVED_PATH):
+    """
+    Solves the game and writes the table to path.
+    """
+    records = b"".join(SOLVED_RECORD.pack(key, value, square)
+                       for key, (value, square) in sorted(solve().items()))
+    count = len(records) // SOLVED_RECORD.size
+    with open(path, "wb") as f:
+        f.write(SOLVED_HEADER.pack(SOLVED_MAGIC, SOLVED_VERSION, count,
+                                   zlib.crc32(records)))
+        f.write(records)
+
+
+def read_solved_table(path=SOLVED_PATH):
+    """
+    Reads a table written by write_solved_table, or returns None if it
+    is missing, of another version, or fails its checksum.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, count, checksum = SOLVED_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    records = data[SOLVED_HEADER.size:]
+    if magic != SOLVED_MAGIC or version != SOLVED_VERSION \
+            or len(records) != count * SOLVED_RECORD.size \
+            or zlib.crc32(records) != checksum:
+        return None
+    solved = {}
+    for key, value, square in SOLVED_RECORD.iter_unpack(records):
+        if not 0 <= square < 9:
+            return None
+        solved[key] = (value, square)
+    return solved
+
+
+if __name__ == "__main__":
+    write_solved_table()
+    print(f"Wrote {len(read_solved_table())} positions to {SOLVED_PATH}")
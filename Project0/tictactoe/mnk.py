@@ -0,0 +1,311 @@
+"""
+Tic Tac Toe generalized to m rows, n columns and k in a row.
+
+Boards are lists of lists of X, O and EMPTY, as in tictactoe.py,
+which plays the 3, 3, 3 game. Bigger boards cannot be searched to the
+end, so best_move deepens the search one ply at a time until a time
+or node budget runs out and scores the positions where it stops with
+a heuristic.
+"""
+
+import math
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Value of a win; quicker wins score a little higher
+WIN = 1_000_000
+
+# Row, column, diagonal and anti-diagonal steps
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Boards with more squares than this only consider moves next to
+# squares already played
+LOCAL_MOVES_ABOVE = 16
+
+# Named board sizes as (m, n, k)
+VARIANTS = {
+    "3x3": (3, 3, 3),
+    "4x4": (4, 4, 4),
+    "7x7": (7, 7, 4),
+}
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised inside a search when its time or node budget runs out.
+    """
+
+
+class Budget():
+    """
+    Limits a search to a number of seconds, of nodes, or both.
+    """
+
+    def __init__(self, seconds=None, nodes=None):
+        self.deadline = None if seconds is None \
+            else time.monotonic() + seconds
+        self.nodes = nodes
+        self.searched = 0
+
+    def spend(self):
+        self.searched += 1
+        if self.nodes is not None and self.searched > self.nodes:
+            raise BudgetExceeded
+        # reading the clock costs more than a node, so do it sometimes
+        if self.deadline is not None and self.searched % 256 == 0 \
+                and time.monotonic() > self.deadline:
+            raise BudgetExceeded
+
+
+class Game():
+    """
+    The rules of m,n,k-game and a budgeted search for its best moves.
+
+    Square (i, j) is numbered i * n + j. Every line of k squares that
+    could be completed is a window; a player who fills a window wins.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if m < 1 or n < 1 or not 1 <= k <= max(m, n):
+            raise ValueError(f"no {k} in a row on a {m} by {n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    if 0 <= i + (k - 1) * di < m \
+                            and 0 <= j + (k - 1) * dj < n:
+                        self.windows.append(tuple(
+                            (i + t * di) * n + j + t * dj for t in range(k)
+                        ))
+        # Indices of the windows through each square
+        self.windows_at = [[] for _ in range(m * n)]
+        for w, window in enumerate(self.windows):
+            for square in window:
+                self.windows_at[square].append(w)
+
+        # Squares adjacent to each square, diagonals included
+        self.adjacent = [
+            [(i + di) * n + j + dj
+             for di in (-1, 0, 1) for dj in (-1, 0, 1)
+             if (di or dj) and 0 <= i + di < m and 0 <= j + dj < n]
+            for i in range(m) for j in range(n)
+        ]
+        # Squares from the center outwards, which own the most windows
+        self.order = sorted(
+            range(m * n),
+            key=lambda s: (abs(s // n - (m - 1) / 2)
+                           + abs(s % n - (n - 1) / 2),
+                           -len(self.windows_at[s]))
+        )
+
+        # SCORES[x][o] is what a window holding x X's and o O's is worth
+        # to X: open windows count more the fuller they are
+        weights = [0] + [4 ** count for count in range(1, k + 1)]
+        self.scores = [
+            [weights[x] if not o else -weights[o] if not x else 0
+             for o in range(k + 1)]
+            for x in range(k + 1)
+        ]
+
+    def initial_state(self):
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        num_x = sum(row.count(X) for row in board)
+        num_o = sum(row.count(O) for row in board)
+        return X if num_x == num_o else O
+
+    def actions(self, board):
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise ValueError(f"square {action} is taken")
+        board = [row[:] for row in board]
+        board[i][j] = self.player(board)
+        return board
+
+    def winner(self, board):
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            mark = cells[window[0]]
+            if mark is not EMPTY \
+                    and all(cells[square] == mark for square in window):
+                return mark
+        return None
+
+    def terminal(self, board):
+        return self.winner(board) is not None \
+            or all(cell is not EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        status = self.winner(board)
+        return 1 if status == X else -1 if status == O else 0
+
+    def best_move(self, board, seconds=1.0, nodes=None):
+        """
+        Returns the best action (i, j) found for the player to move
+        within the budget, or None if the game is over.
+
+        Each iteration searches one ply deeper than the last, starting
+        from the best move so far; an iteration cut short by the
+        budget is discarded. The search stops early once it proves a
+        win or a loss, and always completes the first ply.
+        """
+        if self.terminal(board):
+            return None
+        search = Search(self, board)
+        mark = self.player(board)
+        best = search.moves(mark)[0]
+        budget = Budget(seconds, nodes)
+        for depth in range(1, search.empties + 1):
+            search.budget = budget if depth > 1 else Budget()
+            try:
+                value, best = search.negamax(mark, depth, -math.inf,
+                                             math.inf, 0, first=best)
+            except BudgetExceeded:
+                break
+            if abs(value) > WIN - self.m * self.n:
+                break
+        return divmod(best, self.n)
+
+
+class Search():
+    """
+    One position of a Game, changed in place as moves are tried.
+
+    Each window keeps counts of the X's and O's in it, so a move
+    updates only the windows through its square: a window reaching k
+    is a win, and the heuristic score is kept as a running sum.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [EMPTY] * (game.m * game.n)
+        self.counts = {X: [0] * len(game.windows),
+                       O: [0] * len(game.windows)}
+        # Sum of game.scores over all windows, from X's point of view
+        self.score = 0
+        self.empties = len(self.cells)
+        self.budget = Budget()
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell is not EMPTY:
+                    self.play(i * game.n + j, cell)
+
+    def play(self, square, mark):
+        """
+        Puts mark on square and returns True if that wins.
+        """
+        scores = self.game.scores
+        mine = self.counts[mark]
+        theirs = self.counts[O if mark == X else X]
+        won = False
+        for w in self.game.windows_at[square]:
+            x, o = (mine[w], theirs[w]) if mark == X \
+                else (theirs[w], mine[w])
+            before = scores[x][o]
+            mine[w] += 1
+            if mark == X:
+                x += 1
+            else:
+                o += 1
+            self.score += scores[x][o] - before
+            won = won or mine[w] == self.game.k
+        self.cells[square] = mark
+        self.empties -= 1
+        return won
+
+    def undo(self, square, mark):
+        scores = self.game.scores
+        mine = self.counts[mark]
+        theirs = self.counts[O if mark == X else X]
+        for w in self.game.windows_at[square]:
+            x, o = (mine[w], theirs[w]) if mark == X \
+                else (theirs[w], mine[w])
+            before = scores[x][o]
+            mine[w] -= 1
+            if mark == X:
+                x -= 1
+            else:
+                o -= 1
+            self.score += scores[x][o] - before
+        self.cells[square] = EMPTY
+        self.empties += 1
+
+    def moves(self, mark, first=None):
+        """
+        Returns the squares worth trying for mark, most promising
+        first: first, moves that win at once, moves that stop the
+        opponent winning at once, then from the center outwards.
+        """
+        game = self.game
+        cells = self.cells
+        candidates = [square for square in game.order
+                      if cells[square] is EMPTY]
+        if len(cells) > LOCAL_MOVES_ABOVE \
+                and self.empties < len(cells):
+            near = {square for square, cell in enumerate(cells)
+                    if cell is not EMPTY}
+            near = {adjacent for square in near
+                    for adjacent in game.adjacent[square]}
+            candidates = [square for square in candidates
+                          if square in near]
+
+        mine = self.counts[mark]
+        theirs = self.counts[O if mark == X else X]
+        wins = []
+        blocks = []
+        others = []
+        for square in candidates:
+            if square == first:
+                continue
+            threats = [(mine[w], theirs[w])
+                       for w in game.windows_at[square]]
+            if any(m == game.k - 1 and not t for m, t in threats):
+                wins.append(square)
+            elif any(t == game.k - 1 and not m for m, t in threats):
+                blocks.append(square)
+            else:
+                others.append(square)
+        head = [first] if first is not None and cells[first] is EMPTY \
+            else []
+        return head + wins + blocks + others
+
+    def negamax(self, mark, depth, alpha, beta, ply, first=None):
+        """
+        Returns the value of the position for mark, looking depth
+        plies ahead, and the best square found, or None at a leaf.
+        """
+        self.budget.spend()
+        if self.empties == 0:
+            return 0, None
+        if depth == 0:
+            return (self.score if mark == X else -self.score), None
+
+        other = O if mark == X else X
+        best = -math.inf
+        best_square = None
+        for square in self.moves(mark, first):
+            if self.play(square, mark):
+                value = WIN - ply
+            else:
+                value = -self.negamax(other, depth - 1, -beta, -alpha,
+                                      ply + 1)[0]
+            self.undo(square, mark)
+            if value > best:
+                best = value
+                best_square = square
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        return best, best_square
@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -17,14 +18,27 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Frames per second to draw at
+fps = 60
+# Seconds the computer appears to think for, at least
+think_time = 0.5
+
+clock = pygame.time.Clock()
+# Finds AI moves off the event loop, so the window keeps drawing
+executor = ThreadPoolExecutor(max_workers=1)
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+table = ttt.TranspositionTable()
+# Future of the AI move being found, and when it was asked for
+ai_move = None
+ai_started = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -110,13 +124,13 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(ttt.minimax, board, table)
+                ai_started = time.monotonic()
+            elif ai_move.done() \
+                    and time.monotonic() - ai_started >= think_time:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +155,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    table = ttt.TranspositionTable()
 
     pygame.display.flip()
+    clock.tick(fps)
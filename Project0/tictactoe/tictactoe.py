@@ -3,7 +3,9 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+
+import bitboard
+from bitboard import SearchStats, TranspositionTable
 
 X = "X"
 O = "O"
@@ -47,7 +49,7 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    board = copy.deepcopy(board)
+    board = [row[:] for row in board]
     if player(board) == X:
         board[action[0]][action[1]] = X
     else:
@@ -96,28 +98,20 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, table=None, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    The search runs on bitboards (see bitboard.py). A
+    TranspositionTable shared between calls, for instance for the
+    length of a game, lets positions solved before be answered
+    without searching. A SearchStats, if given, adds up the nodes,
+    cache hits, cutoffs and time the call took.
     """
     if terminal(board):
         return None
-    possible_actions = actions(board)
-    if player(board) == X:
-        max_utility = -math.inf
-        for action in possible_actions:
-            action_val = min_val(result(board, action))
-            if action_val > max_utility:
-                max_utility = action_val
-                optimal_action = action
-    else:
-        min_utility = math.inf
-        for action in possible_actions:
-            action_val = max_val(result(board, action))
-            if action_val < min_utility:
-                min_utility = action_val
-                optimal_action = action
-    return optimal_action
+    x, o = bitboard.to_bits(board)
+    return bitboard.to_action(bitboard.best_move(x, o, table, stats))
 
 def max_val(board):
     """
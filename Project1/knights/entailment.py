@@ -0,0 +1,132 @@
+"""
+Answers many queries against one knowledge base.
+
+A query is entailed if it is true in every model of the knowledge
+base, refuted if it is false in every model, and unknown otherwise.
+A small knowledge base has its models listed once, after which every
+query is a vectorized scan of them. A bigger one keeps the models the
+SAT solver has found so far: a query true in one and false in another
+is unknown at once, and otherwise one solver call per missing side
+settles it and adds a model for later queries.
+"""
+
+import functools
+
+from logic import intern
+from sat import Encoder
+import truthtable
+
+ENTAILED = "entailed"
+REFUTED = "refuted"
+UNKNOWN = "unknown"
+
+# Knowledge bases with more models than this are left to the solver
+MODEL_LIMIT = 1 << 16
+
+
+def entailment(knowledge, queries):
+    """
+    Returns ENTAILED, REFUTED or UNKNOWN for each of queries, reusing
+    the work done for earlier calls on an equal knowledge base.
+    """
+    return knowledge_base(intern(knowledge)).check_many(queries)
+
+
+@functools.lru_cache(maxsize=32)
+def knowledge_base(knowledge):
+    """
+    Returns the KnowledgeBase of an interned sentence.
+    """
+    return KnowledgeBase(knowledge)
+
+
+class KnowledgeBase():
+    """
+    A knowledge base and what is known of its models.
+    """
+
+    def __init__(self, knowledge):
+        self.knowledge = intern(knowledge)
+        # Interned query -> ENTAILED, REFUTED or UNKNOWN
+        self.results = {}
+
+        # Every model as boolean symbol columns, if there are few
+        self.slots = None
+        self.columns = None
+        self.count = None
+        symbols = self.knowledge.symbols()
+        if len(symbols) <= truthtable.TRUTH_TABLE_LIMIT:
+            slots = {symbol: i for i, symbol in enumerate(sorted(symbols))}
+            numbers = truthtable.models(self.knowledge, slots, MODEL_LIMIT)
+            if numbers is not None:
+                self.slots = slots
+                self.columns = truthtable.columns_of(numbers, len(slots))
+                self.count = len(numbers)
+
+        # Otherwise a SAT encoding and the models found with it
+        self.encoder = None
+        self.models = []
+
+    def check_many(self, queries):
+        return [self.check(query) for query in queries]
+
+    def check(self, query):
+        """
+        Returns ENTAILED, REFUTED or UNKNOWN for query.
+        """
+        query = intern(query)
+        if query not in self.results:
+            if self.columns is not None \
+                    and query.symbols() <= self.slots.keys():
+                result = self.scan(query)
+            else:
+                result = self.solve(query)
+            self.results[query] = result
+        return self.results[query]
+
+    def scan(self, query):
+        """
+        Checks query against every model of the knowledge base.
+        """
+        if self.count == 0:
+            # nothing is possible, so everything follows
+            return ENTAILED
+        values = truthtable.evaluate(query, self.slots, self.columns, {})
+        if values.all():
+            return ENTAILED
+        if not values.any():
+            return REFUTED
+        return UNKNOWN
+
+    def solve(self, query):
+        """
+        Checks query against the models found so far, asking the
+        solver for a model on whichever side none has been seen.
+        """
+        symbols = query.symbols()
+        seen = set()
+        for model in self.models:
+            if symbols <= model.keys():
+                seen.add(query.evaluate(model))
+        if len(seen) == 2:
+            return UNKNOWN
+
+        if self.encoder is None:
+            self.encoder = Encoder()
+            self.encoder.add(self.knowledge)
+        literal = self.encoder.literal(query)
+        possible = {}
+        for value in (True, False):
+            if value in seen:
+                possible[value] = True
+                continue
+            assumption = literal if value else -literal
+            possible[value] = self.encoder.solver.solve([assumption])
+            if possible[value]:
+                self.models.append(self.encoder.model())
+        # a knowledge base with no models entails everything
+        if not possible[False]:
+            return ENTAILED
+        if not possible[True]:
+            return REFUTED
+        return UNKNOWN
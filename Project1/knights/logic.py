@@ -1,8 +1,73 @@
+import functools
 import itertools
+import weakref
+
+# Knowledge bases with more symbols than this are checked by the SAT
+# solver in sat.py rather than by enumerating every model
+ENUMERATION_LIMIT = 12
 
 
 class Sentence():
 
+    __slots__ = ("_frozen", "_hash", "_symbols", "_changes", "_interned",
+                 "__weakref__")
+
+    def __init__(self):
+        # A sentence is frozen if nothing in it can change. An And can
+        # gain conjuncts, so it and every sentence containing it are
+        # frozen only once interned
+        self._frozen = all(child._frozen for child in self.children())
+        # Hash and symbols once worked out, kept for good when frozen
+        # and otherwise until an And changes
+        self._hash = None
+        self._symbols = None
+        self._changes = And.changes
+        self._interned = False
+
+    def __eq__(self, other):
+        return isinstance(other, type(self)) and self.key() == other.key()
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are rebuilt through the constructor, and
+        # those of interned sentences are interned again, since equal
+        # interned sentences must be the same object
+        if isinstance(self, Symbol):
+            args = (self.name,)
+        else:
+            args = tuple(self.children())
+        if self._interned:
+            return (type(self).interned, args)
+        return (type(self), args)
+
+    def __hash__(self):
+        self.check_cache()
+        if self._hash is None:
+            self._hash = hash(self.key())
+        return self._hash
+
+    def check_cache(self):
+        """
+        Drops the hash and symbols worked out before an And that the
+        sentence may contain gained a conjunct.
+        """
+        if not self._frozen and self._changes != And.changes:
+            self._hash = None
+            self._symbols = None
+            self._changes = And.changes
+
+    def key(self):
+        """Returns a tuple that identifies the sentence's structure."""
+        return (type(self).__name__, tuple(self.children()))
+
+    def children(self):
+        """Returns the sentences the sentence is built from."""
+        return ()
+
+    @classmethod
+    def interned(cls, *args):
+        """Constructs the interned sentence cls(*args)."""
+        return intern(cls(*args))
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -13,7 +78,20 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        self.check_cache()
+        if self._symbols is not None:
+            return set(self._symbols)
+        symbols = set().union(*[child.symbols()
+                                for child in self.children()])
+        self._symbols = frozenset(symbols)
+        return symbols
+
+    def code(self, slots):
+        """
+        Returns a Python expression for the sentence over an integer
+        model m, where symbol name is bit slots[name] of m.
+        """
+        raise Exception("nothing to compile")
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +122,24 @@ class Sentence():
 
 class Symbol(Sentence):
 
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
+        super().__init__()
+
+    def key(self):
+        return ("symbol", self.name)
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        if not isinstance(other, Symbol):
+            return False
+        # equal interned sentences are the same object
+        if self._interned and other._interned:
+            return self is other
+        return self.name == other.name
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         return self.name
@@ -68,17 +156,33 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def code(self, slots):
+        try:
+            return f"(m >> {slots[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
+
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
+        super().__init__()
+
+    def children(self):
+        return (self.operand,)
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        if not isinstance(other, Not):
+            return False
+        if self._interned and other._interned:
+            return self is other
+        return self.operand == other.operand
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +193,37 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def code(self, slots):
+        return f"(not {self.operand.code(slots)})"
 
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts",)
+
+    # Number of conjuncts ever added to an And, which tells sentences
+    # that are not frozen when their hash and symbols are stale
+    changes = 0
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        super().__init__()
+        # conjuncts can be added, unless the sentence is interned
+        self._frozen = False
+
+    def children(self):
+        return self.conjuncts
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        if not isinstance(other, And):
+            return False
+        if self._interned and other._interned:
+            return self is other
+        return self.conjuncts == other.conjuncts
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +232,12 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self._interned:
+            raise TypeError("interned sentences cannot be changed")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        # drops the hash and symbols of this And and all containing it
+        And.changes += 1
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +248,34 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def code(self, slots):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.code(slots)
+                                  for conjunct in self.conjuncts) + ")"
 
 
 class Or(Sentence):
+
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
+        super().__init__()
+
+    def children(self):
+        return self.disjuncts
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        if not isinstance(other, Or):
+            return False
+        if self._interned and other._interned:
+            return self is other
+        return self.disjuncts == other.disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +290,36 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def code(self, slots):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.code(slots)
+                                 for disjunct in self.disjuncts) + ")"
 
 
 class Implication(Sentence):
+
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
+        super().__init__()
+
+    def children(self):
+        return (self.antecedent, self.consequent)
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
+        if not isinstance(other, Implication):
+            return False
+        if self._interned and other._interned:
+            return self is other
+        return (self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +333,33 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def code(self, slots):
+        return (f"(not {self.antecedent.code(slots)}"
+                f" or {self.consequent.code(slots)})")
 
 
 class Biconditional(Sentence):
+
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
+        super().__init__()
+
+    def children(self):
+        return (self.left, self.right)
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        if not isinstance(other, Biconditional):
+            return False
+        if self._interned and other._interned:
+            return self is other
+        return self.left == other.left and self.right == other.right
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    __hash__ = Sentence.__hash__
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,43 +375,94 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def code(self, slots):
+        return (f"((not {self.left.code(slots)})"
+                f" == (not {self.right.code(slots)}))")
+
+
+# Interned sentences by type and the ids of their interned children
+_intern_table = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns sentence rebuilt from shared, interned nodes: equal
+    sentences give the same object, so they compare by identity.
+    Interned sentences must not be changed.
+    """
+    if sentence._interned:
+        return sentence
+    if isinstance(sentence, Symbol):
+        key = (Symbol, sentence.name)
+        args = (sentence.name,)
+    else:
+        args = [intern(child) for child in sentence.children()]
+        # interned children stay alive as long as their parents, so
+        # their ids stand for them
+        key = (type(sentence), tuple(id(child) for child in args))
+    node = _intern_table.get(key)
+    if node is None:
+        node = type(sentence)(*args)
+        node._interned = True
+        node._frozen = True
+        _intern_table[key] = node
+    return node
+
+
+def compile_sentence(sentence, slots):
+    """
+    Compiles a sentence into a function of an integer model m that
+    returns whether the sentence is true, where symbol name is bit
+    slots[name] of m.
+    """
+    try:
+        return _compile_code(sentence.code(slots))
+    except (SyntaxError, RecursionError, MemoryError):
+        # Too deeply nested for the compiler: evaluate the tree
+        def evaluate(m):
+            return sentence.evaluate({name: bool(m >> slot & 1)
+                                      for name, slot in slots.items()})
+        return evaluate
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_code(code):
+    return eval(f"lambda m: bool({code})")
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    if len(symbols) > ENUMERATION_LIMIT:
+        # sat imports this module, so it is imported when first needed
+        from sat import entails
+        return entails(knowledge, query)
+
+    # Compile one check over models packed into integers, so each
+    # model costs one call rather than a walk of both sentence trees
+    slots = {symbol: i for i, symbol in enumerate(sorted(symbols))}
+    check = compile_sentence(Implication(knowledge, query), slots)
+
+    # Check that knowledge entails query in every model
+    return all(map(check, range(1 << len(symbols))))
+
+
+def model_check_many(knowledge, queries):
+    """
+    Checks which of queries knowledge base entails, returning a list
+    of booleans in the same order.
+    """
+    queries = list(queries)
+    symbols = set.union(knowledge.symbols(),
+                        *[query.symbols() for query in queries])
+
+    # truthtable and sat import this module, so they are imported
+    # when first needed
+    from truthtable import TRUTH_TABLE_LIMIT, model_check_many
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        return model_check_many(knowledge, queries)
+    from sat import entails
+    return [entails(knowledge, query) for query in queries]
@@ -1,3 +1,4 @@
+from entailment import ENTAILED, entailment
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -87,8 +88,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            results = entailment(knowledge, symbols)
+            for symbol, result in zip(symbols, results):
+                if result == ENTAILED:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,399 @@
+"""
+Satisfiability backend for entailment checks on big knowledge bases.
+
+Sentences are turned into clauses by Tseitin encoding, which gives
+every compound subsentence a fresh variable, so the clauses grow
+linearly with the sentence. The clauses are decided by a conflict
+driven clause learning (CDCL) solver: unit propagation over two
+watched literals per clause, learned clauses from the first unique
+implication point, activity-ordered decisions and restarts.
+
+Literals are nonzero integers as in DIMACS: v is variable v true and
+-v is it false.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Solver():
+    """
+    A CDCL SAT solver. Clauses are added with add_clause and solve
+    may be called any number of times, under different assumptions.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        # 1 if a variable is true, -1 if false, 0 if unassigned
+        self.assigns = [0]
+        self.level = [0]
+        # Clause that implied each variable, None for decisions
+        self.reason = [None]
+        self.activity = [0.0]
+        # Last value of each variable, tried first when deciding it
+        self.phase = [-1]
+        self.watches = {}
+        self.clauses = []
+        self.learnts = []
+        # Assigned literals in order, and where each level starts
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.order = []
+        self.increment = 1.0
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+
+    def new_var(self):
+        self.num_vars += 1
+        v = self.num_vars
+        self.assigns.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(-1)
+        self.watches[v] = []
+        self.watches[-v] = []
+        heapq.heappush(self.order, (0.0, v))
+        return v
+
+    def value(self, literal):
+        value = self.assigns[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds the clause that at least one of literals is true.
+        Returns False if the clauses have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        clause = []
+        for literal in dict.fromkeys(literals):
+            value = self.value(literal)
+            if -literal in clause or value == 1:
+                # always true
+                return True
+            if value == 0:
+                clause.append(literal)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def attach(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, literal, reason):
+        v = abs(literal)
+        self.assigns[v] = 1 if literal > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by a unit clause. Returns a
+        clause with all of its literals false, or None.
+        """
+        assigns = self.assigns
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watchers = watches[false]
+            kept = []
+            for index, clause in enumerate(watchers):
+                # keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                first_value = assigns[abs(first)]
+                if (first_value if first > 0 else -first_value) == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = assigns[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[k] = literal, false
+                        watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value != 0:
+                        kept.extend(watchers[index + 1:])
+                        watches[false] = kept
+                        return clause
+                    self.enqueue(first, clause)
+            watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting literal
+        first, and the level to jump back to.
+        """
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        resolved = None
+        while True:
+            for literal in clause:
+                v = abs(literal)
+                if literal != resolved and v not in seen \
+                        and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == current:
+                        pending += 1
+                    else:
+                        learnt.append(literal)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            resolved = self.trail[index]
+            index -= 1
+            seen.discard(abs(resolved))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(resolved)]
+        learnt[0] = -resolved
+
+        # Leave out literals implied by others in the clause
+        learnt[1:] = [
+            literal for literal in learnt[1:]
+            if self.reason[abs(literal)] is None
+            or not all(abs(other) in seen or self.level[abs(other)] == 0
+                       for other in self.reason[abs(literal)]
+                       if other != -literal)
+        ]
+
+        level = 0
+        if len(learnt) > 1:
+            deepest = max(range(1, len(learnt)),
+                          key=lambda i: self.level[abs(learnt[i])])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            level = self.level[abs(learnt[1])]
+        return learnt, level
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [activity * 1e-100
+                             for activity in self.activity]
+            self.increment *= 1e-100
+        if self.assigns[v] == 0:
+            heapq.heappush(self.order, (-self.activity[v], v))
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phase[v] = self.assigns[v]
+            self.assigns[v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+        if len(self.order) > 4 * self.num_vars:
+            # drop the stale entries that backtracking piles up
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.num_vars + 1)
+                          if self.assigns[v] == 0]
+            heapq.heapify(self.order)
+
+    def decision(self):
+        """
+        Returns the unassigned variable with the highest activity, in
+        its saved phase, or None if all are assigned.
+        """
+        while self.order:
+            _, v = heapq.heappop(self.order)
+            if self.assigns[v] == 0:
+                return v if self.phase[v] > 0 else -v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses and the assumed literals can all
+        be true, leaving a satisfying assignment in model, a dict
+        from variable to bool.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        restart = 100
+        conflicts = 0
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    self.conflicts += 1
+                    conflicts += 1
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    learnt, level = self.analyze(conflict)
+                    self.backtrack(level)
+                    if len(learnt) == 1:
+                        self.enqueue(learnt[0], None)
+                    else:
+                        self.attach(learnt)
+                        self.learnts.append(learnt)
+                        self.enqueue(learnt[0], learnt)
+                    self.increment *= 1 / 0.95
+                    if conflicts >= restart:
+                        conflicts = 0
+                        restart = int(restart * 1.5)
+                        self.backtrack(0)
+                    continue
+
+                literal = None
+                while len(self.trail_lim) < len(assumptions):
+                    assumption = assumptions[len(self.trail_lim)]
+                    value = self.value(assumption)
+                    if value == -1:
+                        return False
+                    if value == 0:
+                        literal = assumption
+                        break
+                    # already true: an empty level keeps levels aligned
+                    self.trail_lim.append(len(self.trail))
+                if literal is None:
+                    literal = self.decision()
+                    if literal is None:
+                        self.model = {v: self.assigns[v] == 1
+                                      for v in range(1, self.num_vars + 1)}
+                        return True
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(literal, None)
+        finally:
+            self.backtrack(0)
+
+
+class Encoder():
+    """
+    Tseitin-encodes Sentences into the clauses of a Solver.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        # Symbol name -> variable
+        self.variables = {}
+        # id of an encoded sentence -> (sentence, literal); the
+        # sentence is kept so its id is not reused
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """
+        Adds clauses that make sentence true.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause([self.literal(disjunct)
+                                    for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when sentence is.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        key = id(sentence)
+        if key in self.literals:
+            return self.literals[key][1]
+
+        add_clause = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            if isinstance(sentence, And):
+                children = [self.literal(conjunct)
+                            for conjunct in sentence.conjuncts]
+                sign = 1
+            else:
+                # Or is And with everything negated
+                children = [-self.literal(disjunct)
+                            for disjunct in sentence.disjuncts]
+                sign = -1
+            v = self.solver.new_var()
+            for child in children:
+                add_clause([-v, child])
+            add_clause([v] + [-child for child in children])
+            literal = sign * v
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            literal = self.solver.new_var()
+            add_clause([-literal, -a, b])
+            add_clause([literal, a])
+            add_clause([literal, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.solver.new_var()
+            add_clause([-literal, -a, b])
+            add_clause([-literal, a, -b])
+            add_clause([literal, a, b])
+            add_clause([literal, -a, -b])
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+        self.literals[key] = (sentence, literal)
+        return literal
+
+    def model(self):
+        """
+        Returns the solver's last satisfying assignment by symbol name.
+        """
+        return {name: self.solver.model[v]
+                for name, v in self.variables.items()}
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of sentence, as a dict from symbol name to bool,
+    or None if it has none.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    return encoder.model() if encoder.solver.solve() else None
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge entails query, that is if knowledge and not
+    query cannot both be true.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return not encoder.solver.solve([-encoder.literal(query)])
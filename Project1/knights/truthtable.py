@@ -0,0 +1,123 @@
+"""
+Vectorized truth tables for knowledge bases of up to about 25 symbols.
+
+Models are numbered so that symbol i is bit i of the model's number,
+and a chunk of consecutive models is a set of boolean columns, one per
+symbol. Sentences are evaluated bottom-up on whole columns with NumPy,
+and only one chunk is held at a time.
+"""
+
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Models per chunk are 2 ** CHUNK_BITS
+CHUNK_BITS = 16
+
+# Above this many symbols the table is too big to walk
+TRUTH_TABLE_LIMIT = 25
+
+
+def model_check_many(knowledge, queries):
+    """
+    Returns, for each query, whether knowledge entails it, walking
+    the truth table once for all of them.
+    """
+    queries = list(queries)
+    symbols = set.union(knowledge.symbols(),
+                        *[query.symbols() for query in queries])
+    if len(symbols) > TRUTH_TABLE_LIMIT:
+        raise ValueError(f"{len(symbols)} symbols are too many for a "
+                         f"truth table")
+    slots = {symbol: i for i, symbol in enumerate(sorted(symbols))}
+
+    entailed = [True] * len(queries)
+    for columns in chunks(len(slots)):
+        cache = {}
+        known = evaluate(knowledge, slots, columns, cache)
+        if not known.any():
+            continue
+        for i, query in enumerate(queries):
+            # a model of knowledge where the query is false refutes it
+            if entailed[i] and (
+                known & ~evaluate(query, slots, columns, cache)
+            ).any():
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def models(knowledge, slots, limit):
+    """
+    Returns the numbers of the models of knowledge over the symbols in
+    slots as an array, or None if there are more than limit.
+    """
+    found = []
+    total = 0
+    bits = min(len(slots), CHUNK_BITS)
+    for chunk, columns in enumerate(chunks(len(slots))):
+        numbers = np.flatnonzero(evaluate(knowledge, slots, columns, {}))
+        total += len(numbers)
+        if total > limit:
+            return None
+        found.append(numbers + (chunk << bits))
+    return np.concatenate(found)
+
+
+def columns_of(numbers, n):
+    """
+    Returns the n boolean symbol columns of an array of model numbers.
+    """
+    return [(numbers >> i & 1).astype(bool) for i in range(n)]
+
+
+def chunks(n):
+    """
+    Yields the 2 ** n models of n symbols as lists of n boolean
+    columns, 2 ** CHUNK_BITS models at a time.
+    """
+    bits = min(n, CHUNK_BITS)
+    numbers = np.arange(1 << bits, dtype=np.int64)
+    low = [(numbers >> i & 1).astype(bool) for i in range(bits)]
+    for chunk in range(1 << (n - bits)):
+        # the high symbols are the same throughout a chunk
+        high = [np.full(1 << bits, bool(chunk >> i & 1))
+                for i in range(n - bits)]
+        yield low + high
+
+
+def evaluate(sentence, slots, columns, cache):
+    """
+    Returns the boolean column of sentence over a chunk of models,
+    reusing the columns of subsentences already in cache.
+    """
+    key = id(sentence)
+    if key in cache:
+        return cache[key][1]
+    size = len(columns[0]) if columns else 1
+
+    if isinstance(sentence, Symbol):
+        value = columns[slots[sentence.name]]
+    elif isinstance(sentence, Not):
+        value = ~evaluate(sentence.operand, slots, columns, cache)
+    elif isinstance(sentence, And):
+        value = np.ones(size, dtype=bool)
+        for conjunct in sentence.conjuncts:
+            value &= evaluate(conjunct, slots, columns, cache)
+    elif isinstance(sentence, Or):
+        value = np.zeros(size, dtype=bool)
+        for disjunct in sentence.disjuncts:
+            value |= evaluate(disjunct, slots, columns, cache)
+    elif isinstance(sentence, Implication):
+        value = (~evaluate(sentence.antecedent, slots, columns, cache)
+                 | evaluate(sentence.consequent, slots, columns, cache))
+    elif isinstance(sentence, Biconditional):
+        value = (evaluate(sentence.left, slots, columns, cache)
+                 == evaluate(sentence.right, slots, columns, cache))
+    else:
+        raise TypeError(f"cannot evaluate {type(sentence).__name__}")
+
+    # the sentence is kept so its id is not reused
+    cache[key] = (sentence, value)
+    return value